@@ -1,107 +1,724 @@
-import pygame
-import random
-import math
 import time
-import copy
-from cards import generate_uno_deck
+from cards import (card_text, cards_of_bits, BLACK, NUM_CARD_IDS, CARD_COLOR, CARD_LABEL, CARD_COLOR_NAME, CARD_RANK, CARD_EFFECT,
+                   CARD_DRAW_COUNT, EFFECT_SKIP, EFFECT_REVERSE, EFFECT_DRAW)
+from rules import can_play
+from search import SearchState, TranspositionTable, DRAW, EXACT, LOWER, UPPER
+from tracing import tracer
+
+# Count the colors in a hand and pick the most common one
+def most_common_color(hand):
+    color_counts = {"Red": 0, "Blue": 0, "Green": 0, "Yellow": 0}
+    for card in hand:
+        if CARD_COLOR[card] != BLACK:
+            color_counts[CARD_COLOR_NAME[card]] += 1
+    return max(color_counts.items(), key=lambda x: x[1])[0] if any(color_counts.values()) else "Red"
+
+# Static move ordering by card id: the biggest draw cards first, then skips,
+# then numbers from high to low. The DRAW move (-1) sorts last.
+STATIC_MOVE_ORDER = tuple(
+    100 + CARD_DRAW_COUNT[card] if CARD_EFFECT[card] == EFFECT_DRAW
+    else 50 if CARD_EFFECT[card] in (EFFECT_SKIP, EFFECT_REVERSE)
+    else CARD_RANK[card]
+    for card in range(NUM_CARD_IDS)
+) + (-1,)
+
+# Value of each card id in the evaluation's special card score, and the
+# bitmask of the card ids that score at all
+SPECIAL_CARD_SCORE = bytes(
+    5 if CARD_EFFECT[card] in (EFFECT_SKIP, EFFECT_REVERSE)
+    else 10 if CARD_EFFECT[card] == EFFECT_DRAW
+    else 0
+    for card in range(NUM_CARD_IDS)
+)
+SPECIAL_CARD_BITS = sum(1 << card for card in range(NUM_CARD_IDS) if SPECIAL_CARD_SCORE[card])
+
+def hand_special_score(state, side):
+    """Special card score of a SearchState hand, from its bitmask"""
+    counts = state.counts[side]
+    return sum(SPECIAL_CARD_SCORE[card] * counts[card]
+               for card in cards_of_bits(state.bits[side] & SPECIAL_CARD_BITS))
+
+# Largest change of AIBot._evaluate_state from one action (see _eval_range)
+EVAL_SWING = 10 * 8 + 2 + 10
+# Added to the evaluation of a finished game for the winner, so that a win
+# (reaching the goal or emptying the hand) outweighs anything else
+WIN_SCORE = 10000
+
+class SearchAborted(Exception):
+    """Raised inside the search when the time or node budget runs out"""
+
+
+class SearchStats:
+    """
+    Numbers about one find_best_move() search. Bots fill in what they
+    measure; the rest stays None (ISMCTSBot has no depth or table, for one).
+    """
+
+    def __init__(self, bot):
+        self.bot = type(bot).__name__
+        self.nodes = 0
+        self.leaf_evaluations = None
+        self.cutoffs_by_ply = None
+        self.first_move_cutoff_rate = None
+        self.chance_cutoffs = None
+        self.depth_reached = None
+        self.iterations = []  # (depth, nodes, seconds) of each finished iteration
+        self.unfinished = None  # (depth, nodes, seconds) of the iteration cut off by the budget
+        self.tt_probes = None
+        self.tt_hits = None
+        self.tt_cutoffs = None
+        self.wall_time = 0.0
+        self.best_move = None  # Card id, or DRAW
+        self.score = None
+        self.pv = []
+
+    @property
+    def cutoffs(self):
+        return sum(self.cutoffs_by_ply) if self.cutoffs_by_ply is not None else None
+
+    @property
+    def tt_hit_rate(self):
+        return self.tt_hits / self.tt_probes if self.tt_probes else None
+
+    @property
+    def nodes_per_sec(self):
+        return self.nodes / self.wall_time if self.wall_time else 0.0
+
+    @property
+    def branching_factor(self):
+        """
+        Effective branching factor of the deepest iteration: the b for
+        which b + b^2 + ... + b^depth equals its node count
+        """
+        if not self.iterations:
+            return None
+        depth, nodes, _ = self.iterations[-1]
+        low, high = 1.0, max(2.0, float(nodes))
+        for _ in range(50):
+            b = (low + high) / 2
+            if sum(b ** d for d in range(1, depth + 1)) < nodes:
+                low = b
+            else:
+                high = b
+        return low
+
+    def as_dict(self):
+        stats = {key: value for key, value in vars(self).items()}
+        for key in ('cutoffs', 'tt_hit_rate', 'nodes_per_sec', 'branching_factor'):
+            stats[key] = getattr(self, key)
+        return stats
+
+    def lines(self):
+        """The stats as short lines of text, for printing or the in-game overlay"""
+        lines = [f"{self.bot}: {self.nodes} nodes in {self.wall_time * 1000:.0f} ms "
+                 f"({self.nodes_per_sec:.0f}/s)"]
+        if self.depth_reached is not None:
+            branching = self.branching_factor
+            lines.append(f"depth {self.depth_reached}, branching "
+                         + (f"{branching:.2f}" if branching is not None else "-"))
+        if self.leaf_evaluations is not None:
+            lines.append(f"leaf evaluations {self.leaf_evaluations}")
+        if self.cutoffs_by_ply is not None:
+            lines.append(f"cutoffs {self.cutoffs}, first move {self.first_move_cutoff_rate:.0%}, "
+                         f"chance {self.chance_cutoffs}")
+            lines.append("by ply " + " ".join(str(n) for n in self.cutoffs_by_ply[:8]))
+        if self.tt_probes is not None:
+            hit_rate = self.tt_hit_rate
+            lines.append(f"table {self.tt_hits}/{self.tt_probes} hits"
+                         + (f" ({hit_rate:.0%})" if hit_rate is not None else "")
+                         + f", {self.tt_cutoffs} cutoffs")
+        for depth, nodes, seconds in self.iterations[-4:]:
+            lines.append(f"  ply {depth}: {nodes} nodes, {seconds * 1000:.1f} ms")
+        if self.unfinished is not None:
+            depth, nodes, seconds = self.unfinished
+            lines.append(f"  ply {depth}: {nodes} nodes, {seconds * 1000:.1f} ms (unfinished)")
+        return lines
+
+# Clean implementation of the AI Bot class with Minimax and Alpha-Beta Pruning
+class AIBot:
+    def __init__(self, game, player_name="AI", opponent="Player1"):
+        self.game = game
+        self.player_name = player_name
+        self.opponent = opponent
+        self.thinking_delay = 1.0
+        self.max_depth = 32  # Deepest iteration; usually the time budget ends the search first
+        self.time_budget = None  # Seconds per move, None to use thinking_delay, 0 for no limit
+        self.node_budget = None  # Nodes per move, None for no limit
+        self.cancelled = False  # Set from another thread to stop the search
+        self.last_move = None
+        self.tt = TranspositionTable()
+        self.nodes = 0
+        self.evaluations = 0  # Leaf evaluations of the current search
+        self.deadline = None
+        self.stats = None  # SearchStats of the last search
+        self.stats_callback = None  # Called with the SearchStats after every search
+        self.depth_reached = 0
+        self.depth_limited = False
+        self.pv = []
+
+        # Move ordering: killer moves per ply and a history table per side,
+        # both indexed by move (card id, or DRAW which indexes the last slot)
+        self.move_ordering = True
+        self.killers = []
+        self.history = [[0] * (NUM_CARD_IDS + 1) for _ in range(2)]
+        self.cutoffs_by_ply = []
+        self.first_move_cutoffs = 0
+
+        # Drawing can be searched as a chance node over the unseen cards. Off
+        # by default: it still plays weaker against tournament.py's random bot
+        # than searching a draw as a single move
+        self.chance_nodes = False
+        self.star2_probing = True
+        self.chance_cutoffs = 0
+
+    def find_best_move(self):
+        """
+        Iterative deepening: search depth 1, 2, ... until the time or node
+        budget runs out and play the best move of the deepest finished search
+        """
+        try:
+            state = self._create_game_state()
+            possible_moves = self._get_possible_moves(state)
+
+            if not possible_moves:
+                return {'type': 'draw'}
+
+            self.tt.new_search()
+            self._reset_move_ordering()
+            entry = self.tt.probe(state.hash)
+            possible_moves = self._order_moves(state, possible_moves, entry[4] if entry else None, 0)
+
+            budget = self.thinking_delay if self.time_budget is None else self.time_budget
+            start = time.perf_counter()
+            self.deadline = time.time() + budget if budget else None
+            self.nodes = 0
+            self.evaluations = 0
+            self.depth_reached = 0
+            self.pv = []
+            best_move = possible_moves[0]  # Default to first valid move
+            best_score = None
+            stats = SearchStats(self)
+            tt = self.tt
+            tt_start = (tt.probes, tt.hits, tt.cutoffs)
+
+            # With a single legal move there is nothing to search
+            depth = 1 if len(possible_moves) > 1 else self.max_depth + 1
+            while depth <= self.max_depth:
+                self.depth_limited = False
+                iteration_start = time.perf_counter()
+                iteration_nodes = self.nodes
+                try:
+                    best_move, best_score = self._search_root(state, possible_moves, depth)
+                except SearchAborted:
+                    # The state was left mid-search; it is not used again
+                    stats.unfinished = (depth, self.nodes - iteration_nodes,
+                                        time.perf_counter() - iteration_start)
+                    tracer.complete(f"depth {depth} (unfinished)", "search", iteration_start,
+                                    time.perf_counter(), {'nodes': stats.unfinished[1]})
+                    break
+                self.depth_reached = depth
+                stats.iterations.append((depth, self.nodes - iteration_nodes,
+                                         time.perf_counter() - iteration_start))
+                tracer.complete(f"depth {depth}", "search", iteration_start, time.perf_counter(),
+                                {'nodes': stats.iterations[-1][1], 'score': best_score})
+                self.pv = self._principal_variation(state, depth)
+
+                # Search the previous best move first in the next iteration;
+                # deeper in the tree the PV moves come from the table
+                possible_moves.remove(best_move)
+                possible_moves.insert(0, best_move)
+
+                # Stop once the whole game tree fits in the search
+                if not self.depth_limited:
+                    break
+                depth += 1
+
+            stats.wall_time = time.perf_counter() - start
+            stats.nodes = self.nodes
+            stats.leaf_evaluations = self.evaluations
+            cutoffs = self.cutoff_stats()
+            stats.cutoffs_by_ply = cutoffs['cutoffs_by_ply']
+            stats.first_move_cutoff_rate = cutoffs['first_move_cutoff_rate']
+            stats.chance_cutoffs = self.chance_cutoffs
+            stats.depth_reached = self.depth_reached
+            stats.tt_probes = tt.probes - tt_start[0]
+            stats.tt_hits = tt.hits - tt_start[1]
+            stats.tt_cutoffs = tt.cutoffs - tt_start[2]
+            stats.best_move = best_move
+            stats.score = best_score
+            stats.pv = list(self.pv)
+            self.stats = stats
+            if self.stats_callback is not None:
+                self.stats_callback(stats)
+            tracer.complete(f"{type(self).__name__}.find_best_move", "search", start, time.perf_counter(),
+                            {'player': self.player_name, 'nodes': self.nodes, 'depth': self.depth_reached})
+
+            self.last_move = self._move_to_dict(best_move)
+            return self.last_move
+
+        except Exception as e:
+            print(f"AI error: {e}")
+            # Fallback to simple strategy if Minimax fails
+            return self._fallback_strategy()
+
+    def _search_root(self, state, moves, depth):
+        """Alpha-beta search of the root moves; returns (best move, score)"""
+        best_score = float('-inf')
+        best_move = moves[0]
+        alpha = float('-inf')
+        beta = float('inf')
+
+        for move in moves:
+            move_start = time.perf_counter()
+            score = self._search_move(state, move, depth, alpha, beta, 0)
+            if tracer.enabled:
+                tracer.complete(card_text(move) if move != DRAW else "draw", "search",
+                                move_start, time.perf_counter(), {'depth': depth, 'score': score})
+
+            if score > best_score:
+                best_score = score
+                best_move = move
+
+            alpha = max(alpha, best_score)
+
+        self.tt.store(state.hash, depth, EXACT, best_score, best_move)
+        return best_move, best_score
+
+    def _principal_variation(self, state, depth):
+        """Follow the table's best moves from the root"""
+        pv = []
+        undos = []
+        while len(pv) < depth and not state.is_terminal():
+            entry = self.tt.probe(state.hash)
+            if entry is None:
+                break
+            move = entry[4]
+            if move not in state.moves():
+                break
+            pv.append(move)
+            undos.append(state.apply(move))
+        while undos:
+            state.undo(undos.pop())
+        return pv
+
+    def _move_to_dict(self, move):
+        if move == DRAW:
+            return {'type': 'draw'}
+        hand = self.game.state.player_hands[self.player_name]
+        return {'type': 'play', 'card_index': hand.index(move), 'card': move}
+
+    def _fallback_strategy(self):
+        """Simple fallback strategy when Minimax fails"""
+        hand = self.game.state.player_hands[self.player_name]
+        current_card_color = CARD_COLOR[self.game.state.current_card]
+        current_card_label = CARD_LABEL[self.game.state.current_card]
+
+        # Try to play matching color first
+        for i, card in enumerate(hand):
+            if CARD_COLOR[card] == current_card_color:
+                return {'type': 'play', 'card_index': i, 'card': card}
+
+        # Then try matching label
+        for i, card in enumerate(hand):
+            if CARD_LABEL[card] == current_card_label:
+                return {'type': 'play', 'card_index': i, 'card': card}
+
+        # Then wild cards
+        for i, card in enumerate(hand):
+            if CARD_COLOR[card] == BLACK:
+                return {'type': 'play', 'card_index': i, 'card': card}
+
+        # Finally draw if nothing else
+        return {'type': 'draw'}
+
+    def _reset_move_ordering(self):
+        """Clear the killers and age the history table before a new search"""
+        self.killers = []
+        for side_history in self.history:
+            for key in range(len(side_history)):
+                side_history[key] >>= 1
+        self.cutoffs_by_ply = []
+        self.first_move_cutoffs = 0
+        self.chance_cutoffs = 0
+
+    def _order_moves(self, state, moves, tt_move, ply):
+        """
+        Sort moves for alpha-beta: the table's (PV) move, then the killer
+        moves of this ply, then by history score, then by static order
+        """
+        if not self.move_ordering:
+            if tt_move is not None:
+                moves.sort(key=lambda move: move != tt_move)
+            return moves
+        killers = self.killers[ply] if ply < len(self.killers) else ()
+        history = self.history[state.to_move]
+
+        def order(move):
+            if move == tt_move:
+                return (3, 0, 0)
+            if move in killers:
+                return (2, -killers.index(move), 0)
+            return (1, history[move], STATIC_MOVE_ORDER[move])
+
+        moves.sort(key=order, reverse=True)
+        return moves
+
+    def _record_cutoff(self, state, move, depth, ply, move_number):
+        """Update killers, history and cutoff stats for a move that caused a cutoff"""
+        while len(self.cutoffs_by_ply) <= ply:
+            self.cutoffs_by_ply.append(0)
+        self.cutoffs_by_ply[ply] += 1
+        if move_number == 0:
+            self.first_move_cutoffs += 1
+
+        self.history[state.to_move][move] += depth * depth
+        while len(self.killers) <= ply:
+            self.killers.append([])
+        killers = self.killers[ply]
+        if move not in killers:
+            killers.insert(0, move)
+            del killers[2:]
+
+    def cutoff_stats(self):
+        """Alpha-beta cutoff counts of the last search"""
+        total = sum(self.cutoffs_by_ply)
+        return {
+            'nodes': self.nodes,
+            'cutoffs': total,
+            'cutoffs_by_ply': list(self.cutoffs_by_ply),
+            'first_move_cutoff_rate': self.first_move_cutoffs / total if total else 0.0,
+        }
+
+    def _minimax(self, state, depth, alpha, beta, ply):
+        """Minimax with alpha-beta pruning; the state is restored before returning"""
+        self.nodes += 1
+        if self.node_budget is not None and self.nodes >= self.node_budget:
+            raise SearchAborted()
+        if not self.nodes & 255 and (self.cancelled or
+                                     self.deadline is not None and time.time() >= self.deadline):
+            raise SearchAborted()
+
+        if state.is_terminal():
+            return self._evaluate_state(state)
+        if depth <= 0:
+            self.depth_limited = True
+            return self._evaluate_state(state)
+
+        # Positions reached through a different move order are looked up
+        # in the transposition table instead of being searched again
+        key = state.hash
+        entry = self.tt.probe(key)
+        if entry is not None and entry[1] >= depth:
+            flag, value = entry[2], entry[3]
+            if flag == EXACT or (flag == LOWER and value >= beta) or (flag == UPPER and value <= alpha):
+                self.tt.cutoffs += 1
+                # The stored result may itself stop at a depth limit
+                self.depth_limited = True
+                return value
+
+        moves = self._get_possible_moves(state)
+        if not moves:
+            return self._evaluate_state(state)
+        moves = self._order_moves(state, moves, entry[4] if entry else None, ply)
+
+        alpha_orig, beta_orig = alpha, beta
+        best_move = moves[0]
+        if state.to_move == 0:
+            best_eval = float('-inf')
+            for i, move in enumerate(moves):
+                eval = self._search_move(state, move, depth, alpha, beta, ply)
+                if eval > best_eval:
+                    best_eval = eval
+                    best_move = move
+                alpha = max(alpha, eval)
+                if beta <= alpha:
+                    self._record_cutoff(state, move, depth, ply, i)
+                    break
+        else:
+            best_eval = float('inf')
+            for i, move in enumerate(moves):
+                eval = self._search_move(state, move, depth, alpha, beta, ply)
+                if eval < best_eval:
+                    best_eval = eval
+                    best_move = move
+                beta = min(beta, eval)
+                if beta <= alpha:
+                    self._record_cutoff(state, move, depth, ply, i)
+                    break
+
+        if best_eval <= alpha_orig:
+            flag = UPPER
+        elif best_eval >= beta_orig:
+            flag = LOWER
+        else:
+            flag = EXACT
+        self.tt.store(key, depth, flag, best_eval, best_move)
+        return best_eval
+
+    def _search_move(self, state, move, depth, alpha, beta, ply):
+        """Value of playing `move` at a node searched to `depth`"""
+        if move == DRAW and self.chance_nodes and state.unseen_total:
+            return self._chance(state, depth, alpha, beta, ply)
+        undo = self._simulate_move(state, move)
+        eval = self._minimax(state, depth - 1, alpha, beta, ply + 1)
+        state.undo(undo)
+        return eval
+
+    def _eval_range(self, state, depth):
+        """
+        Range that the values below a chance node searched to `depth` stay in,
+        for Star1/Star2. One action moves the position difference by at most
+        10 (x8 in the evaluation), a hand by one card (x2) and the special
+        card score by 10. If the game can end within the depth, the range
+        also takes in WIN_SCORE.
+        """
+        span = EVAL_SWING * 2 * (depth + 1)
+        eval = self._evaluate_state(state)
+        if min(state.sizes) <= depth + 1 or state.goal - max(state.pos) <= 10 * (depth + 1):
+            span += WIN_SCORE
+        return eval - span, eval + span
+
+    def _draw_outcome(self, state, card, depth, alpha, beta, ply, probe=False):
+        """
+        Value of drawing `card`. A playable drawn card is played straight
+        away, as ai_make_move does; that play is a ply of its own. With
+        `probe`, only the first move of the resulting node is searched, which
+        bounds its value from one side.
+        Returns (value, whether the resulting node is a max node).
+        """
+        playable = can_play(card, state.current_card)
+        undo = state.apply_draw(card)
+        undo_play = state.apply(card) if playable else None
+        depth -= 2 if playable else 1
+        maximizing = state.to_move == 0
+        if not probe:
+            eval = self._minimax(state, depth, alpha, beta, ply + 1)
+        elif depth <= 0 or state.is_terminal():
+            eval = self._evaluate_state(state)
+        else:
+            moves = self._get_possible_moves(state)
+            if moves:
+                entry = self.tt.probe(state.hash)
+                moves = self._order_moves(state, moves, entry[4] if entry else None, ply + 1)
+                eval = self._search_move(state, moves[0], depth, alpha, beta, ply + 1)
+            else:
+                eval = self._evaluate_state(state)
+        if undo_play is not None:
+            state.undo(undo_play)
+        state.undo(undo)
+        return eval, maximizing
+
+    def _chance(self, state, depth, alpha, beta, ply):
+        """
+        Expected value of drawing over the unseen cards (expectiminimax).
+        Star2 first probes every outcome with one move to get cheap bounds;
+        Star1 then searches the outcomes with windows derived from the bounds
+        of the others and stops once the expectation is outside (alpha, beta).
+        """
+        outcomes = state.draw_outcomes()
+        lo, hi = self._eval_range(state, depth)
+        lower = [lo] * len(outcomes)
+        upper = [hi] * len(outcomes)
+        sum_lower = lo
+        sum_upper = hi
+
+        # Star2 probing pass
+        if self.star2_probing and depth > 1:
+            for i, (card, p) in enumerate(outcomes):
+                a = max((alpha - (sum_upper - p * upper[i])) / p, lo)
+                b = min((beta - (sum_lower - p * lower[i])) / p, hi)
+                eval, maximizing = self._draw_outcome(state, card, depth, a, b, ply, probe=True)
+                eval = min(max(eval, lo), hi)
+                # One move of a max node is a lower bound, of a min node an upper
+                # bound, unless that move's own search failed the other way
+                if maximizing and eval > a and eval > lower[i]:
+                    sum_lower += p * (eval - lower[i])
+                    lower[i] = eval
+                elif not maximizing and eval < b and eval < upper[i]:
+                    sum_upper += p * (eval - upper[i])
+                    upper[i] = eval
+                if sum_lower >= beta:
+                    self.chance_cutoffs += 1
+                    return sum_lower
+                if sum_upper <= alpha:
+                    self.chance_cutoffs += 1
+                    return sum_upper
+
+        # Star1 pass
+        for i, (card, p) in enumerate(outcomes):
+            a = max((alpha - (sum_upper - p * upper[i])) / p, lo)
+            b = min((beta - (sum_lower - p * lower[i])) / p, hi)
+            eval, _ = self._draw_outcome(state, card, depth, a, b, ply)
+            # Results from the table may come from deeper searches
+            eval = min(max(eval, lo), hi)
+            if eval <= a and a > lo:
+                new_lower, new_upper = lower[i], min(upper[i], eval)
+            elif eval >= b and b < hi:
+                new_lower, new_upper = max(lower[i], eval), upper[i]
+            else:
+                new_lower = new_upper = eval
+            sum_lower += p * (new_lower - lower[i])
+            sum_upper += p * (new_upper - upper[i])
+            lower[i], upper[i] = new_lower, new_upper
+            if sum_lower >= beta:
+                self.chance_cutoffs += 1
+                return sum_lower
+            if sum_upper <= alpha:
+                self.chance_cutoffs += 1
+                return sum_upper
+
+        return sum_lower
+
+    def _simulate_move(self, state, move):
+        """Apply a move to the search state in place and return its undo record"""
+        return state.apply(move)
+
+    def _create_game_state(self):
+        """Create a search state for AI evaluation"""
+        return SearchState.from_game(self.game.state, self.player_name, self.opponent)
+
+    def _get_possible_moves(self, state):
+        """Get all possible moves for the player to move"""
+        return state.moves()
+
+    def _evaluate_state(self, state):
+        """Evaluate the game state from AI's perspective"""
+        self.evaluations += 1
+        ai_pos, human_pos = state.pos
+
+        # Position difference
+        position_score = ai_pos - human_pos
+
+        # Card advantage
+        card_score = state.sizes[1] - state.sizes[0]
+
+        # Distance to goal
+        ai_distance = state.goal - ai_pos
+        human_distance = state.goal - human_pos
+        distance_score = human_distance - ai_distance
+
+        # Special cards in hand
+        special_card_score = hand_special_score(state, 0)
+
+        # Combine scores with weights
+        total_score = (
+            position_score * 3 +
+            card_score * 2 +
+            distance_score * 5 +
+            special_card_score
+        )
+
+        # A finished game
+        if ai_pos >= state.goal or not state.sizes[0]:
+            total_score += WIN_SCORE
+        elif human_pos >= state.goal or not state.sizes[1]:
+            total_score -= WIN_SCORE
+
+        return total_score
+
+    def choose_color(self):
+        """Choose the most advantageous color based on AI's hand"""
+        return most_common_color(self.game.state.player_hands[self.player_name])
 
 # AI Bot Class - Simplified to ensure it works
 class MinimaxAIBot:
-    def __init__(self, player_name="Player2"):
+    def __init__(self, game, player_name="Player2", opponent="Player1"):
+        self.game = game
         self.player_name = player_name
+        self.opponent = opponent
         self.thinking = False
         self.last_move_time = 0
         self.thinking_delay = 2.0  # 2 seconds delay for thinking animation
         self.max_depth = 3  # Maximum depth for minimax search
-    
+        self.nodes = 0  # Nodes searched by the last find_best_move()
+
     def start_thinking(self):
         """Start the thinking process and set the thinking flag"""
         self.thinking = True
         self.last_move_time = time.time()
         return "AI is thinking..."
-    
+
     def is_ready_to_move(self):
         """Check if the AI is ready to make a move after thinking"""
         return self.thinking and (time.time() - self.last_move_time >= self.thinking_delay)
-    
-    def find_best_move(self, player_hand):
+
+    def find_best_move(self):
         """Find the best move using minimax with alpha-beta pruning"""
+        game_state = self._create_game_state()
+        self.nodes = 0
+
         # Find playable cards
-        playable_cards = []
-        for i, card in enumerate(player_hand):
-            if can_play_card(card):
-                playable_cards.append((i, card))
-        
+        playable_cards = [i for i in game_state.moves() if i != DRAW]
+
         if not playable_cards:
             return None  # No playable cards, need to draw
-        
+
         # Use minimax with alpha-beta pruning to find the best move
         best_score = float('-inf')
         best_move = None
-        
-        # Create a copy of the game state for simulation
-        game_state = self._create_game_state()
-        
-        for idx, card in playable_cards:
+
+        for card in playable_cards:
             # Simulate playing this card
-            new_state = self._simulate_play_card(game_state, card, True)
-            score = self._minimax(new_state, 1, False, float('-inf'), float('inf'))
-            
+            undo = game_state.apply(card)
+            score = self._minimax(game_state, 1, float('-inf'), float('inf'))
+            game_state.undo(undo)
+
             if score > best_score:
                 best_score = score
-                best_move = idx
-        
-        return best_move
-    
+                best_move = card
+
+        # Index of the card in the hand
+        return self.game.state.player_hands[self.player_name].index(best_move)
+
     def _create_game_state(self):
-        """Create a simplified copy of the current game state"""
-        state = {
-            'players': copy.deepcopy(players),
-            'player_hands': {p: player_hands[p].copy() for p in active_players},
-            'current_card': current_card.copy(),
-            'current_player_idx': current_player_idx,
-            'deck_size': len(deck)
-        }
-        return state
-    
-    def _minimax(self, state, depth, is_maximizing, alpha, beta):
+        """Create a search state from the current game"""
+        return SearchState.from_game(self.game.state, self.player_name, self.opponent)
+
+    def _minimax(self, state, depth, alpha, beta):
         """
         Minimax algorithm with alpha-beta pruning
-        
+
         Parameters:
-        - state: Current game state
+        - state: Current search state, restored before returning
         - depth: Current depth in the search tree
-        - is_maximizing: True if maximizing player's turn, False otherwise
         - alpha: Alpha value for pruning
         - beta: Beta value for pruning
-        
+
         Returns:
         - Score of the best move
         """
+        self.nodes += 1
+
         # Terminal conditions
-        if depth >= self.max_depth or self._is_game_over(state):
+        if depth >= self.max_depth or state.is_terminal():
             return self._evaluate_state(state)
-        
-        # Get current player
-        current_p = "Player2" if is_maximizing else "Player1"
-        
+
+        is_maximizing = state.to_move == 0
+
         # Get playable cards for the current player
-        playable_cards = []
-        for card in state['player_hands'][current_p]:
-            if self._can_play_card(card, state['current_card']):
-                playable_cards.append(card)
-        
-        # If no playable cards, simulate drawing
+        playable_cards = [i for i in state.moves() if i != DRAW]
+
+        # If no playable cards, the player draws: a chance node over the
+        # cards the draw can give. With nothing left to draw, the turn passes
         if not playable_cards:
-            # In a real implementation, we would simulate drawing and continue
-            # For simplicity, we'll use a moderate score
-            return 0 if is_maximizing else 50
-        
+            if not state.deck_size or not state.unseen_total:
+                undo = state.apply(DRAW)
+                score = self._minimax(state, depth + 1, alpha, beta)
+                state.undo(undo)
+                return score
+            expected = 0.0
+            for card, p in state.draw_outcomes():
+                undo = state.apply_draw(card)
+                expected += p * self._minimax(state, depth + 1, float('-inf'), float('inf'))
+                state.undo(undo)
+            return expected
+
         if is_maximizing:
             max_eval = float('-inf')
             for card in playable_cards:
-                new_state = self._simulate_play_card(state, card, is_maximizing)
-                eval = self._minimax(new_state, depth + 1, False, alpha, beta)
+                undo = state.apply(card)
+                eval = self._minimax(state, depth + 1, alpha, beta)
+                state.undo(undo)
                 max_eval = max(max_eval, eval)
                 alpha = max(alpha, eval)
                 if beta <= alpha:
@@ -110,147 +727,53 @@ class MinimaxAIBot:
         else:
             min_eval = float('inf')
             for card in playable_cards:
-                new_state = self._simulate_play_card(state, card, is_maximizing)
-                eval = self._minimax(new_state, depth + 1, True, alpha, beta)
+                undo = state.apply(card)
+                eval = self._minimax(state, depth + 1, alpha, beta)
+                state.undo(undo)
                 min_eval = min(min_eval, eval)
                 beta = min(beta, eval)
                 if beta <= alpha:
                     break  # Alpha cutoff
             return min_eval
-    
-    def _simulate_play_card(self, state, card, is_maximizing):
-        """Simulate playing a card and return the resulting state"""
-        # Create a deep copy of the state to modify
-        new_state = copy.deepcopy(state)
-        
-        # Determine which player is playing
-        player = "Player2" if is_maximizing else "Player1"
-        
-        # Remove card from hand
-        if card in new_state['player_hands'][player]:
-            new_state['player_hands'][player].remove(card)
-        
-        # Update current card
-        new_state['current_card'] = card.copy()
-        
-        # Apply card effects based on its label
-        if card["label"].isdigit():
-            # Move player forward
-            steps = int(card["label"])
-            new_state['players'][player]["pos"] += steps
-        elif card["label"] == "Skip" or card["label"] == "Reverse":
-            # Skip opponent's turn (in this game both have the same effect)
-            opponent = "Player1" if is_maximizing else "Player2"
-            new_state['players'][opponent]["skip_turn"] = True
-        elif card["label"].startswith("Draw"):
-            # Move opponent backward
-            opponent = "Player1" if is_maximizing else "Player2"
-            draw_count = int(card["label"].split()[1])
-            new_state['players'][opponent]["pos"] = max(1, new_state['players'][opponent]["pos"] - draw_count)
-            
-            # For non-black Draw cards, also simulate opponent drawing cards
-            if card["color"] != "Black" and new_state['deck_size'] > 0:
-                new_state['deck_size'] -= min(draw_count, new_state['deck_size'])
-                # We don't actually need to add cards to the hand in simulation
-        
-        # Update positions, ensuring they stay within bounds
-        for p in new_state['players']:
-            pos = new_state['players'][p]["pos"]
-            pos = max(1, min(pos, ROWS * COLS))
-            new_state['players'][p]["pos"] = pos
-            
-            # Update target position for visualization
-            row, col = 0, 0  # This is just a placeholder in simulation
-            new_state['players'][p]["target_pos"] = (row, col)
-        
-        return new_state
-    
-    def _can_play_card(self, card, current):
-        """Check if a card can be played on the current card"""
-        # Black cards can be played on anything
-        if card["color"] == "Black":
-            return True
-        
-        # Same color or same label
-        if card["color"] == current["color"] or card["label"] == current["label"]:
-            return True
-        
-        # Current card is black (any card can be played)
-        if current["color"] == "Black":
-            return True
-        
-        return False
-    
-    def _is_game_over(self, state):
-        """Check if the game is over in the current state"""
-        # Check if any player has reached the end or has no cards
-        for player in ["Player1", "Player2"]:
-            if state['players'][player]["pos"] >= ROWS * COLS:
-                return True
-            if len(state['player_hands'][player]) == 0:
-                return True
-        return False
-    
+
     def _evaluate_state(self, state):
         """
         Evaluate the game state from AI's perspective
         A higher score means a better position for the AI
         """
         # Get positions
-        ai_pos = state['players']["Player2"]["pos"]
-        human_pos = state['players']["Player1"]["pos"]
-        
+        ai_pos, human_pos = state.pos
+
         # Position difference (higher is better for AI)
         position_score = ai_pos - human_pos
-        
+
         # Card advantage (fewer cards is better)
-        ai_cards = len(state['player_hands']["Player2"])
-        human_cards = len(state['player_hands']["Player1"]) if "Player1" in state['player_hands'] else 0
-        card_score = human_cards - ai_cards
-        
+        card_score = state.sizes[1] - state.sizes[0]
+
         # Distance to goal
-        ai_distance = ROWS * COLS - ai_pos
-        human_distance = ROWS * COLS - human_pos
+        ai_distance = state.goal - ai_pos
+        human_distance = state.goal - human_pos
         distance_score = human_distance - ai_distance
-        
+
         # Special cards in hand are valuable
-        special_card_score = 0
-        for card in state['player_hands']["Player2"]:
-            if card["label"] == "Skip" or card["label"] == "Reverse":
-                special_card_score += 5
-            elif card["label"].startswith("Draw"):
-                special_card_score += 10
-            elif card["color"] == "Black":
-                special_card_score += 15
-        
+        special_card_score = hand_special_score(state, 0)
+
         # Win/loss states
-        if ai_pos >= ROWS * COLS:
+        if ai_pos >= state.goal:
             return 1000  # AI wins
-        if human_pos >= ROWS * COLS:
+        if human_pos >= state.goal:
             return -1000  # Human wins
-        
+
         # Combine all factors with appropriate weights
         total_score = (
-            position_score * 3 + 
-            card_score * 2 + 
-            distance_score * 5 + 
+            position_score * 3 +
+            card_score * 2 +
+            distance_score * 5 +
             special_card_score
         )
-        
+
         return total_score
-    
+
     def choose_color(self):
         """Choose the best color after playing a black card"""
-        # Count colors in hand
-        color_counts = {"Red": 0, "Blue": 0, "Green": 0, "Yellow": 0}
-        for card in player_hands[self.player_name]:
-            if card["color"] in color_counts:
-                color_counts[card["color"]] += 1
-        
-        # Choose most common color
-        best_color = max(color_counts.items(), key=lambda x: x[1])[0] if any(color_counts.values()) else "Red"
-        return best_color
-# Create AI bot instance
-# Replace the existing AIBot class with MinimaxAIBot
-
-# Initialize the AI bot with MinimaxAIBot
+        return most_common_color(self.game.state.player_hands[self.player_name])
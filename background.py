@@ -0,0 +1,65 @@
+# background.py
+# Runs an AI bot's search on a worker thread so that the pygame loop keeps
+# drawing and handling input. The search works on a snapshot of the game and
+# posts its move to a queue that the main loop polls.
+import copy
+import queue
+import threading
+from engine import Engine
+
+class BackgroundSearch:
+    def __init__(self, bot):
+        self.bot = bot
+        self.results = queue.Queue()
+        self.searcher = None
+        self.generation = 0  # Results of older (cancelled) searches are dropped
+        self.pending = False
+
+    def start(self, move=None):
+        """
+        Start searching the game's current position. A `move` that is already
+        known (from pondering) is delivered without a search.
+        """
+        self.cancel()
+        self.generation += 1
+        self.pending = True
+        if move is not None:
+            self.results.put((self.generation, move))
+            return
+
+        # A shallow copy of the bot searches a copy of the game, so the game
+        # can change while it thinks. Tables such as the bot's transposition
+        # table are shared, so what it learns carries over to later moves.
+        searcher = copy.copy(self.bot)
+        searcher.game = Engine.from_state(self.bot.game.state.copy())
+        searcher.cancelled = False
+        self.searcher = searcher
+        threading.Thread(target=self._run, args=(searcher, self.generation), daemon=True).start()
+
+    def _run(self, searcher, generation):
+        try:
+            move = searcher.find_best_move()
+        except Exception as e:
+            print(f"AI error: {e}")
+            move = {'type': 'draw'}
+        self.results.put((generation, move))
+
+    def poll(self):
+        """The move found by the current search, or None if it is not done yet"""
+        while self.pending:
+            try:
+                generation, move = self.results.get_nowait()
+            except queue.Empty:
+                return None
+            if generation == self.generation:
+                self.pending = False
+                return move
+        return None
+
+    def cancel(self):
+        """Stop the current search; its move will not be delivered"""
+        if self.searcher is not None:
+            self.searcher.cancelled = True
+            self.searcher = None
+        self.generation += 1
+        self.pending = False
@@ -0,0 +1,326 @@
+# benchmark.py
+# Benchmarks of the rules, search and rendering hot paths. Every benchmark
+# runs from fixed seeded positions and reports the best time per operation
+# over several repeats, which is the least noisy number on a busy machine.
+# Results can be saved as a JSON baseline and later runs compared against
+# it; the run fails when a benchmark is slower than the baseline by more
+# than the threshold, or when a search benchmark visits a different number
+# of nodes (node counts are deterministic, so any change is a real one).
+#
+#   python benchmark.py --save                # write benchmark_baseline.json
+#   python benchmark.py --compare             # exit 1 on a regression
+#   python benchmark.py --filter search --threshold 0.5
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+from cards import generate_uno_deck, generate_uno_deck_ids
+from engine import Engine, get_filtered_deck
+from aibot import AIBot
+
+BASELINE = "benchmark_baseline.json"
+POSITIONS = 8  # Seeded positions for the search benchmarks
+SLOW_SECONDS = 2.0  # Benchmarks slower than this in total stop after two repeats
+# A search benchmark timed fewer times than this swings by half from run to
+# run, so only its node count is gated
+MIN_TIMED_REPEATS = 3
+# Frame-time slowdowns smaller than this are noise, whatever the ratio: an
+# idle dirty-rect frame takes about 20 us and a busy machine adds 10 us or
+# more, while drawing the whole frame again costs over a millisecond
+FRAME_NOISE_SECONDS = 20e-6
+
+def positions(count=POSITIONS):
+    """Engines of freshly dealt games with the AI to move, seeds 0 .. count - 1"""
+    games = []
+    for seed in range(count):
+        game = Engine(["Player1", "AI"], seed=seed)
+        game.state.current_player_idx = 1
+        games.append(game)
+    return games
+
+
+# Every benchmark does its setup and returns (run, ops) or (run, ops, extra):
+# run() performs `ops` operations and is what gets timed. `extra` is a dict of
+# numbers stored with the result (such as node counts); its "prepare" entry,
+# if any, is called untimed before every run.
+
+def bench_generate_uno_deck():
+    def run():
+        for _ in range(20):
+            generate_uno_deck()
+    return run, 20
+
+def bench_generate_uno_deck_ids():
+    def run():
+        for _ in range(20):
+            generate_uno_deck_ids()
+    return run, 20
+
+def bench_can_play_card():
+    game = positions(1)[0]
+    state = game.state
+    cards = list(get_filtered_deck())
+    tops = cards[::5]
+    can_play_card = game.can_play_card
+
+    def run():
+        for top in tops:
+            state.current_card = top
+            for card in cards:
+                can_play_card(card)
+    return run, len(tops) * len(cards)
+
+def bench_playable_mask():
+    game = positions(1)[0]
+    state = game.state
+    cards = list(get_filtered_deck())
+    hands = [cards[i:i + 7] for i in range(0, len(cards) - 7, 7)]
+    tops = cards[::5]
+
+    def run():
+        for top in tops:
+            state.current_card = top
+            for hand in hands:
+                game.playable_mask(hand)
+    return run, len(tops) * len(hands)
+
+def bench_apply_card_effect():
+    game = positions(1)[0]
+    state = game.state
+    deck = list(state.deck)
+    cards = sorted(set(get_filtered_deck()))
+    middle = state.goal // 2  # Far enough from both ends that nobody wins
+
+    def run():
+        state.deck = deck[:]
+        for card in cards:
+            for info in state.players.values():
+                info["pos"] = middle
+                info["skip_turn"] = False
+            state.black_card_played = False
+            state.waiting_for_color_choice = False
+            game.apply_card_effect(card, 0)
+    return run, len(cards)
+
+def _search_setup():
+    bots = []
+    for game in positions():
+        bot = AIBot(game, "AI", "Player1")
+        bots.append((bot, bot._create_game_state()))
+    return bots
+
+def bench_get_possible_moves():
+    bots = _search_setup()
+
+    def run():
+        for bot, state in bots:
+            bot._get_possible_moves(state)
+    return run, len(bots)
+
+def bench_simulate_move():
+    bots = _search_setup()
+    moves = [(bot, state, bot._get_possible_moves(state)) for bot, state in bots]
+
+    def run():
+        for bot, state, state_moves in moves:
+            for move in state_moves:
+                state.undo(bot._simulate_move(state, move))
+    return run, sum(len(state_moves) for _, _, state_moves in moves)
+
+def minimax_bench(depth, chance_nodes):
+    """Full-width alpha-beta search of the seeded positions to `depth`, from an empty table"""
+    def bench():
+        states = [state for _, state in _search_setup()]
+        games = positions()
+        bots = []
+        nodes = []
+
+        def prepare():
+            # New bots, so that no table or history carries over between runs
+            bots[:] = [AIBot(game, "AI", "Player1") for game in games]
+            for bot in bots:
+                bot.chance_nodes = chance_nodes
+
+        def run():
+            nodes.clear()
+            for bot, state in zip(bots, states):
+                bot._minimax(state, depth, float('-inf'), float('inf'), 0)
+                nodes.append(bot.nodes)
+        prepare()
+        run()
+        return run, len(states), {'nodes': sum(nodes), 'prepare': prepare}
+    return bench
+
+def render_bench(full_redraw, frames=300):
+    """Median frame time of main.py's game loop with no input, on the dummy video driver"""
+    def bench():
+        os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+        os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+        import runpy
+        import pygame
+
+        times = []
+
+        # Feed the loop no events, then QUIT after `frames` frames, and
+        # let it run unthrottled
+        def get_events(*args, **kwargs):
+            original_get()
+            times.append(time.perf_counter())
+            return [pygame.event.Event(pygame.QUIT)] if len(times) > frames else []
+
+        class Clock:
+            def tick(self, *args):
+                return 0
+
+        def run():
+            times.clear()
+            argv = sys.argv
+            sys.argv = ["main.py", "--no-ponder"] + (["--full-redraw"] if full_redraw else [])
+            pygame.event.get, pygame.time.Clock = get_events, Clock
+            try:
+                runpy.run_path(os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py"))
+            finally:
+                sys.argv = argv
+                pygame.event.get, pygame.time.Clock = original_get, original_clock
+
+        original_get, original_clock = pygame.event.get, pygame.time.Clock
+        return run, 1, {'frame_times': times}
+    return bench
+
+
+BENCHMARKS = {
+    'cards.generate_uno_deck': bench_generate_uno_deck,
+    'cards.generate_uno_deck_ids': bench_generate_uno_deck_ids,
+    'engine.can_play_card': bench_can_play_card,
+    'engine.playable_mask': bench_playable_mask,
+    'engine.apply_card_effect': bench_apply_card_effect,
+    'aibot.get_possible_moves': bench_get_possible_moves,
+    'aibot.simulate_move': bench_simulate_move,
+}
+for depth in range(1, 7):
+    BENCHMARKS[f'aibot.minimax_depth{depth}'] = minimax_bench(depth, chance_nodes=False)
+# Chance nodes multiply the tree by the number of distinct unseen cards
+for depth in range(1, 4):
+    BENCHMARKS[f'aibot.expectiminimax_depth{depth}'] = minimax_bench(depth, chance_nodes=True)
+BENCHMARKS['render.frame_full_redraw'] = render_bench(full_redraw=True)
+BENCHMARKS['render.frame_dirty_rects'] = render_bench(full_redraw=False)
+
+
+def measure(name, repeat):
+    """Result dict of one benchmark"""
+    setup = BENCHMARKS[name]()
+    run, ops = setup[:2]
+    extra = setup[2] if len(setup) > 2 else {}
+    if name.startswith("render."):
+        # The time of a frame is its median over a run of the game loop,
+        # and the best run counts
+        frame_times = extra.pop('frame_times')
+        medians = []
+        for _ in range(repeat):
+            run()
+            gaps = sorted(b - a for a, b in zip(frame_times[1:], frame_times[2:]))
+            medians.append(gaps[len(gaps) // 2] if gaps else 0.0)
+            ops = len(gaps)
+        seconds = min(medians)
+        repeats = len(medians)
+    else:
+        prepare = extra.pop('prepare', None)
+        times = []
+        while len(times) < repeat and (len(times) < 2 or sum(times) < SLOW_SECONDS):
+            if prepare is not None:
+                prepare()
+            start = time.perf_counter()
+            run()
+            times.append(time.perf_counter() - start)
+        seconds = min(times) / ops
+        repeats = len(times)
+    return dict(seconds=seconds, ops=ops, repeats=repeats, **extra)
+
+def run_benchmarks(names, repeat=5):
+    results = {}
+    for name in names:
+        try:
+            results[name] = measure(name, repeat)
+        except ImportError as e:  # pygame is only needed for the render benchmarks
+            print(f"{name}: skipped ({e})")
+    return results
+
+def format_time(seconds):
+    if seconds >= 1:
+        return f"{seconds:.2f} s"
+    if seconds >= 1e-3:
+        return f"{seconds * 1e3:.2f} ms"
+    return f"{seconds * 1e6:.2f} us"
+
+def compare(results, baseline, threshold):
+    """Print the results against a baseline; returns the names that regressed"""
+    regressions = []
+    print(f"{'benchmark':<34}{'time/op':>12}{'baseline':>12}{'change':>9}")
+    for name, result in results.items():
+        base = baseline.get(name)
+        line = f"{name:<34}{format_time(result['seconds']):>12}"
+        if base and base['seconds'] > 0:
+            change = result['seconds'] / base['seconds'] - 1
+            line += f"{format_time(base['seconds']):>12}{change:>+9.0%}"
+            floor = FRAME_NOISE_SECONDS if name.startswith("render.") else 0.0
+            if 'nodes' in result and result['repeats'] < MIN_TIMED_REPEATS:
+                line += "  (nodes only)"
+            elif change > threshold and result['seconds'] - base['seconds'] > floor:
+                regressions.append(name)
+                line += "  REGRESSION"
+        if base and 'nodes' in base and result.get('nodes') != base['nodes']:
+            if name not in regressions:
+                regressions.append(name)
+            line += f"  NODES {result.get('nodes')} != {base['nodes']}"
+        print(line)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the rules, search and rendering hot paths")
+    parser.add_argument("--filter", default="", help="only benchmarks whose name contains this")
+    parser.add_argument("--repeat", type=int, default=5, help="timing repeats; the best one counts")
+    parser.add_argument("--save", nargs="?", const=BASELINE, metavar="PATH",
+                        help=f"save the results as a baseline (default {BASELINE})")
+    parser.add_argument("--compare", nargs="?", const=BASELINE, metavar="PATH",
+                        help=f"compare with a baseline (default {BASELINE}) and fail on regressions")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="slowdown that counts as a regression, as a fraction (default 0.25)")
+    args = parser.parse_args()
+
+    names = [name for name in BENCHMARKS if args.filter in name]
+    results = run_benchmarks(names, args.repeat)
+
+    baseline = {}
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)['results']
+    regressions = compare(results, baseline, args.threshold)
+
+    # A slowdown only counts if a second measurement shows it too, because
+    # the load on the machine comes and goes; node counts need no second look
+    if regressions:
+        print("Measuring the regressions again")
+        for name, result in run_benchmarks(regressions, args.repeat).items():
+            results[name]['seconds'] = min(results[name]['seconds'], result['seconds'])
+        regressions = compare({name: results[name] for name in regressions}, baseline, args.threshold)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump({
+                'python': platform.python_version(),
+                'machine': platform.machine(),
+                'processor': platform.processor(),
+                'results': results,
+            }, f, indent=2, sort_keys=True)
+        print(f"Saved {args.save}")
+
+    if regressions:
+        print(f"{len(regressions)} benchmark(s) slower than the baseline by more than {args.threshold:.0%}"
+              " or searching a different number of nodes")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
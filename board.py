@@ -0,0 +1,58 @@
+# board.py
+# Layout of the snake board (snakes and ladders style): square 1 is in the
+# bottom-left corner and the rows alternate direction going up. The lookup
+# tables are flat arrays, so every lookup is O(1) whatever the board size.
+from array import array
+from functools import lru_cache
+
+class Board:
+    """
+    Forward and inverse maps between positions (1 .. size) and cells.
+    pos_row/pos_col are indexed by position (index 0 is unused) and
+    cell_pos by row * cols + col.
+    """
+
+    def __init__(self, rows, cols):
+        self.rows = rows
+        self.cols = cols
+        self.size = rows * cols
+        self.pos_row = array("I", bytes(4 * (self.size + 1)))
+        self.pos_col = array("I", bytes(4 * (self.size + 1)))
+        self.cell_pos = array("I", bytes(4 * self.size))
+
+        pos = 1
+        for row in range(rows - 1, -1, -1):  # Start from bottom row
+            columns = range(cols) if (rows - 1 - row) % 2 == 0 else range(cols - 1, -1, -1)
+            for col in columns:
+                self.pos_row[pos] = row
+                self.pos_col[pos] = col
+                self.cell_pos[row * cols + col] = pos
+                pos += 1
+
+    def clamp(self, pos):
+        return max(1, min(pos, self.size))
+
+    def position(self, row, col):
+        return self.cell_pos[row * self.cols + col]
+
+    def pixel_centers(self, cell_width, cell_height, x0=0, y0=0):
+        """Arrays of the screen x and y of each position's cell center"""
+        xs = array("i", (x0 + col * cell_width + cell_width // 2 for col in self.pos_col))
+        ys = array("i", (y0 + row * cell_height + cell_height // 2 for row in self.pos_row))
+        return xs, ys
+
+
+def parse_board_size(text):
+    """(rows, cols) of a board size written as ROWSxCOLS, such as "50x50"; raises ValueError"""
+    parts = text.lower().split("x")
+    if len(parts) != 2 or not all(part.strip().isdigit() for part in parts):
+        raise ValueError(f"board size must be ROWSxCOLS, such as 50x50, not {text!r}")
+    rows, cols = int(parts[0]), int(parts[1])
+    if rows < 1 or cols < 1:
+        raise ValueError(f"board needs at least one row and one column, not {text!r}")
+    return rows, cols
+
+@lru_cache(maxsize=None)
+def get_board(rows, cols):
+    """The shared Board for a board size"""
+    return Board(rows, cols)
@@ -0,0 +1,71 @@
+# camera.py
+# Scrolling view onto the board, so boards of any size can be played.
+# World coordinates are board pixels at the current zoom with (0, 0) at the
+# board's top-left corner; the view is a window of the viewport's size
+# into that world. Nothing in here imports pygame.
+
+ZOOM_LEVELS = (0.25, 0.5, 1.0, 2.0)
+DEFAULT_ZOOM = 2  # Index of 1.0 in ZOOM_LEVELS
+
+class Camera:
+    def __init__(self, board, view_width, view_height, cell_width, cell_height, zoom_index=DEFAULT_ZOOM):
+        self.board = board
+        self.view_width = view_width
+        self.view_height = view_height
+        self.base_cell_width = cell_width  # Cell size at zoom 1.0
+        self.base_cell_height = cell_height
+        self.zoom_index = zoom_index
+        self.x = 0  # World position of the view's top-left corner
+        self.y = 0
+        self._centers = {}
+
+    @property
+    def zoom(self):
+        return ZOOM_LEVELS[self.zoom_index]
+
+    @property
+    def cell_width(self):
+        return max(4, int(self.base_cell_width * self.zoom))
+
+    @property
+    def cell_height(self):
+        return max(4, int(self.base_cell_height * self.zoom))
+
+    @property
+    def world_width(self):
+        return self.board.cols * self.cell_width
+
+    @property
+    def world_height(self):
+        return self.board.rows * self.cell_height
+
+    def zoom_by(self, steps):
+        """Change the zoom level; returns True if it changed"""
+        zoom_index = max(0, min(self.zoom_index + steps, len(ZOOM_LEVELS) - 1))
+        changed = zoom_index != self.zoom_index
+        self.zoom_index = zoom_index
+        return changed
+
+    def centers(self):
+        """World x and y arrays of each position's cell center at this zoom"""
+        centers = self._centers.get(self.zoom_index)
+        if centers is None:
+            centers = self._centers[self.zoom_index] = self.board.pixel_centers(self.cell_width, self.cell_height)
+        return centers
+
+    def look_at(self, pos):
+        """Center the view on a position's cell, without showing past the board's edges"""
+        xs, ys = self.centers()
+        pos = self.board.clamp(pos)
+        self.x = max(0, min(xs[pos] - self.view_width // 2, self.world_width - self.view_width))
+        self.y = max(0, min(ys[pos] - self.view_height // 2, self.world_height - self.view_height))
+
+    def visible_tiles(self, tile_cells):
+        """(tile_row, tile_col) of every tile of tile_cells x tile_cells cells in view"""
+        tile_width = tile_cells * self.cell_width
+        tile_height = tile_cells * self.cell_height
+        last_col = min(self.x + self.view_width, self.world_width) - 1
+        last_row = min(self.y + self.view_height, self.world_height) - 1
+        return [(tile_row, tile_col)
+                for tile_row in range(self.y // tile_height, last_row // tile_height + 1)
+                for tile_col in range(self.x // tile_width, last_col // tile_width + 1)]
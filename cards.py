@@ -1,5 +1,86 @@
 # cards.py
 import random
+from array import array
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional, only generate_uno_deck_numpy needs it
+    np = None
+
+COLOR_NAMES = ["Red", "Green", "Blue", "Yellow", "Black"]
+BLACK = COLOR_NAMES.index("Black")
+LABELS = [str(num) for num in range(10)] + ["Skip", "Reverse", "Draw 2", "Draw 4", "Draw 10"]
+
+# Card effects
+EFFECT_MOVE = 0     # Number card, the player moves forward
+EFFECT_SKIP = 1
+EFFECT_REVERSE = 2
+EFFECT_DRAW = 3     # Draw card, the next player moves back
+
+# A card id packs (color, label) into one small int: color * len(LABELS) + label.
+# Every combination gets an id (75 in total) so a black card recolored after
+# being played still has one. Number labels sit at indices 0-9, so the label
+# index of a number card is also its value.
+NUM_CARD_IDS = len(COLOR_NAMES) * len(LABELS)
+
+# Per-id lookup tables, indexed by card id
+CARD_COLOR = bytes(card // len(LABELS) for card in range(NUM_CARD_IDS))
+CARD_LABEL = bytes(card % len(LABELS) for card in range(NUM_CARD_IDS))
+CARD_IS_NUMBER = tuple(label < 10 for label in CARD_LABEL)
+CARD_RANK = tuple(label if label < 10 else -1 for label in CARD_LABEL)
+CARD_EFFECT = bytes(
+    EFFECT_MOVE if label < 10
+    else EFFECT_SKIP if LABELS[label] == "Skip"
+    else EFFECT_REVERSE if LABELS[label] == "Reverse"
+    else EFFECT_DRAW
+    for label in CARD_LABEL
+)
+CARD_DRAW_COUNT = bytes(
+    int(LABELS[label].split()[1]) if LABELS[label].startswith("Draw") else 0
+    for label in CARD_LABEL
+)
+# Bitmasks over card ids: bit `card` is set for every card of the color or label
+COLOR_BITS = tuple(sum(1 << card for card in range(NUM_CARD_IDS) if CARD_COLOR[card] == color)
+                   for color in range(len(COLOR_NAMES)))
+LABEL_BITS = tuple(sum(1 << card for card in range(NUM_CARD_IDS) if CARD_LABEL[card] == label)
+                   for label in range(len(LABELS)))
+ALL_CARD_BITS = (1 << NUM_CARD_IDS) - 1
+CARD_COLOR_NAME = tuple(COLOR_NAMES[color] for color in CARD_COLOR)
+CARD_LABEL_NAME = tuple(LABELS[label] for label in CARD_LABEL)
+
+_CARD_IDS = {(CARD_COLOR_NAME[card], CARD_LABEL_NAME[card]): card for card in range(NUM_CARD_IDS)}
+
+def card_id(card):
+    """Card id for a {"color": ..., "label": ...} dict"""
+    return _CARD_IDS[(card["color"], card["label"])]
+
+def card_from_id(card):
+    """Dict form of a card id, for the UI"""
+    return {"color": CARD_COLOR_NAME[card], "label": CARD_LABEL_NAME[card]}
+
+def recolor(card, color):
+    """Id of the same card with a different color (after a black card is played)"""
+    return COLOR_NAMES.index(color) * len(LABELS) + CARD_LABEL[card]
+
+def card_text(card):
+    return f"{CARD_COLOR_NAME[card]} {CARD_LABEL_NAME[card]}"
+
+_CARDS_OF_BITS = {}
+
+def cards_of_bits(bits):
+    """Card ids of the set bits of a card bitmask, in id order (memoized)"""
+    cards = _CARDS_OF_BITS.get(bits)
+    if cards is None:
+        cards = []
+        rest = bits
+        while rest:
+            low = rest & -rest
+            cards.append(low.bit_length() - 1)
+            rest ^= low
+        cards = tuple(cards)
+        if len(_CARDS_OF_BITS) < 1 << 16:  # A search only meets a few thousand hands
+            _CARDS_OF_BITS[bits] = cards
+    return cards
 
 def generate_uno_deck():
     colors = ["Red", "Green", "Blue", "Yellow"]
@@ -23,6 +104,16 @@ def generate_uno_deck():
             deck.append({"color": "Black", "label": "Draw 10"})
     return deck
 
+def generate_uno_deck_ids():
+    """The same deck as generate_uno_deck, as an array('B') of card ids"""
+    return array("B", (card_id(card) for card in generate_uno_deck()))
+
+def generate_uno_deck_numpy():
+    """The same deck as generate_uno_deck, as a NumPy uint8 array of card ids"""
+    if np is None:
+        raise ImportError("generate_uno_deck_numpy requires NumPy")
+    return np.frombuffer(generate_uno_deck_ids(), dtype=np.uint8).copy()
+
 if __name__ == "__main__":
     deck = generate_uno_deck()
     random.shuffle(deck)
@@ -0,0 +1,268 @@
+# engine.py
+# Headless UNO board-game rules. Nothing in here imports pygame, so the
+# engine can be driven from batch jobs, tests and the AI as well as from
+# the renderer in main.py.
+# Cards are ids from cards.py; use card_from_id() to get the dict form.
+import random
+from array import array
+from board import get_board
+from rules import PLAYABLE, playable_mask
+from cards import (generate_uno_deck_ids, recolor, BLACK, CARD_COLOR,
+                   CARD_IS_NUMBER, CARD_RANK, CARD_EFFECT, CARD_DRAW_COUNT,
+                   EFFECT_MOVE, EFFECT_SKIP, EFFECT_REVERSE, EFFECT_DRAW)
+
+ROWS, COLS = 10, 10
+HAND_SIZE = 7
+DEFAULT_PLAYERS = ["Player1", "AI"]
+
+# UNO deck without 0 cards
+FILTERED_DECK = array("B", (card for card in generate_uno_deck_ids() if CARD_RANK[card] != 0))
+
+def get_filtered_deck():
+    return array("B", FILTERED_DECK)
+
+
+class GameState:
+    """All mutable state of a single game"""
+
+    def __init__(self, active_players=None, rows=ROWS, cols=COLS):
+        self.rows = rows
+        self.cols = cols
+        self.board = get_board(rows, cols)  # Shared, read-only position tables
+        self.active_players = list(active_players or DEFAULT_PLAYERS)
+        self.players = {p: {"pos": 1, "skip_turn": False} for p in self.active_players}
+        self.player_hands = {p: [] for p in self.active_players}
+        self.deck = []
+        self.current_card = None
+        self.current_player_idx = 0
+        self.game_direction = 1  # 1 for normal order, -1 for reversed
+        self.black_card_played = False
+        self.waiting_for_color_choice = False
+        self.has_drawn_card = False  # Current player has drawn a card this turn
+        self.can_play_drawn_card = False  # The drawn card can be played
+        self.winner = None
+        self.message = ""
+        self.message_timer = 0  # Seconds the message is still shown for
+
+    @property
+    def current_player(self):
+        return self.active_players[self.current_player_idx]
+
+    @property
+    def goal(self):
+        return self.board.size
+
+    def copy(self):
+        """Independent copy of the state"""
+        new = GameState.__new__(GameState)
+        new.__dict__.update(self.__dict__)
+        new.active_players = self.active_players[:]
+        new.players = {p: dict(info) for p, info in self.players.items()}
+        new.player_hands = {p: hand[:] for p, hand in self.player_hands.items()}
+        new.deck = self.deck[:]
+        return new
+
+
+class Engine:
+    """Rules of the game, applied to a GameState"""
+
+    def __init__(self, active_players=None, rows=ROWS, cols=COLS, seed=None, rng=None):
+        self.rng = rng or random.Random(seed)
+        self.state = GameState(active_players, rows, cols)
+        self.deal()
+
+    @classmethod
+    def from_state(cls, state, rng=None):
+        """Engine that plays on an existing GameState (nothing is dealt)"""
+        engine = cls.__new__(cls)
+        engine.rng = rng or random.Random()
+        engine.state = state
+        return engine
+
+    def deal(self):
+        """Shuffle a fresh deck, deal the hands and turn up a number card"""
+        state = self.state
+        state.deck = get_filtered_deck()
+        self.rng.shuffle(state.deck)
+        for player in state.active_players:
+            state.player_hands[player] = [state.deck.pop() for _ in range(HAND_SIZE)]
+        state.current_card = state.deck.pop()
+        # Make sure the starting card is not a special card
+        while not CARD_IS_NUMBER[state.current_card]:
+            state.deck.append(state.current_card)
+            self.rng.shuffle(state.deck)
+            state.current_card = state.deck.pop()
+
+    def post_message(self, text, seconds=2.0):
+        self.state.message = text
+        self.state.message_timer = seconds
+
+    @property
+    def game_over(self):
+        return self.state.winner is not None
+
+    # Check if a card can be played on the current card
+    def can_play_card(self, card):
+        state = self.state
+        return PLAYABLE[state.black_card_played][state.current_card][card]
+
+    def playable_mask(self, hand):
+        """bytes with a 1 for each card of `hand` that can be played now"""
+        state = self.state
+        return playable_mask(hand, state.current_card, state.black_card_played)
+
+    # Handle the effects of playing a card
+    def apply_card_effect(self, card, player_idx):
+        state = self.state
+        players = state.players
+        active_players = state.active_players
+        player = active_players[player_idx]
+        effect = CARD_EFFECT[card]
+
+        # If it's a number card, move the player
+        if effect == EFFECT_MOVE:
+            steps = CARD_RANK[card]
+            players[player]["pos"] += steps
+            self.post_message(f"{player} moves {steps} steps")
+
+        # Special cards
+        elif effect == EFFECT_SKIP:
+            next_player = active_players[(player_idx + state.game_direction) % len(active_players)]
+            players[next_player]["skip_turn"] = True
+            self.post_message(f"{next_player} turn skipped!")
+
+        elif effect == EFFECT_REVERSE:
+            # Modified: Reverse now works as Skip
+            next_player = active_players[(player_idx + state.game_direction) % len(active_players)]
+            players[next_player]["skip_turn"] = True
+            self.post_message(f"Reverse used as Skip! {next_player} turn skipped!")
+
+        elif effect == EFFECT_DRAW:
+            next_player = active_players[(player_idx + state.game_direction) % len(active_players)]
+            draw_count = CARD_DRAW_COUNT[card]
+
+            # Draw cards make the next player move backward (whether colored or black)
+            players[next_player]["pos"] = max(1, players[next_player]["pos"] - draw_count)
+
+            # For black Draw cards, the current player gets to play again
+            if CARD_COLOR[card] == BLACK:
+                self.post_message(f"{next_player} moves back {draw_count} steps! {player} gets another turn!")
+                state.black_card_played = True
+                state.waiting_for_color_choice = True
+            else:
+                # For colored Draw cards, the next player also draws cards
+                for _ in range(min(draw_count, len(state.deck))):
+                    state.player_hands[next_player].append(state.deck.pop())
+                self.post_message(f"{next_player} moves back {draw_count} steps! and draws {draw_count} cards!")
+
+        # Make sure position is within bounds
+        players[player]["pos"] = max(1, min(players[player]["pos"], state.goal))
+
+        # Check for win condition
+        if players[player]["pos"] >= state.goal:
+            state.winner = player
+            self.post_message(f"{player} WINS!")
+            return True
+
+        return False
+
+    # Get the next player's turn
+    def advance_turn(self):
+        state = self.state
+        players = state.players
+        active_players = state.active_players
+
+        # Reset the per-turn flags
+        state.black_card_played = False
+        state.has_drawn_card = False
+        state.can_play_drawn_card = False
+
+        next_idx = (state.current_player_idx + state.game_direction) % len(active_players)
+
+        # Skip players who have a skip_turn flag
+        while players[active_players[next_idx]]["skip_turn"]:
+            players[active_players[next_idx]]["skip_turn"] = False  # Reset the skip flag
+            next_idx = (next_idx + state.game_direction) % len(active_players)
+
+        state.current_player_idx = next_idx
+
+    # Play a selected card from the current player's hand
+    def play_card(self, card_idx):
+        """Returns True if the card was played"""
+        state = self.state
+        player = state.current_player
+        hand = state.player_hands[player]
+        card = hand[card_idx]
+
+        # Check if the card can be played
+        if not self.can_play_card(card):
+            self.post_message("Can't play that card!")
+            return False
+
+        hand.pop(card_idx)
+        game_over = self.apply_card_effect(card, state.current_player_idx)
+        state.current_card = card
+
+        if game_over:
+            return True
+
+        # Check if hand is empty (player wins)
+        if not hand:
+            state.winner = player
+            self.post_message(f"{player} WINS!", 5.0)
+            return True
+
+        # If we're waiting for color choice, don't advance turn
+        if state.waiting_for_color_choice:
+            return True
+
+        # Advance to the next player (this also ends a black-card bonus turn)
+        self.advance_turn()
+
+        # If the next player's hand is empty, draw a card
+        next_hand = state.player_hands[state.current_player]
+        if not next_hand and state.deck:
+            next_hand.append(state.deck.pop())
+        return True
+
+    # Draw a card from the deck for the current player
+    def draw_from_deck(self):
+        """Returns the drawn card, or None if nothing was drawn"""
+        state = self.state
+        player = state.current_player
+
+        # Check if player has already drawn a card this turn
+        if state.has_drawn_card:
+            self.post_message("Picking cards again not allowed!")
+            # End the player's turn if they try to draw again
+            if not state.black_card_played:
+                self.advance_turn()
+            return None
+
+        if not state.deck:
+            self.post_message("Deck is empty!")
+            return None
+
+        # Mark that player has drawn a card this turn
+        state.has_drawn_card = True
+        new_card = state.deck.pop()
+        state.player_hands[player].append(new_card)
+
+        # Check if the drawn card can be played
+        if self.can_play_card(new_card):
+            self.post_message(f"{player} draws a card - you can play it!")
+            # Don't advance turn yet to give them a chance to play it
+            state.can_play_drawn_card = True
+        else:
+            self.post_message(f"{player} draws a card")
+            # If card can't be played and not after black card, advance turn
+            if not state.black_card_played:
+                self.advance_turn()
+        return new_card
+
+    # Set a color for the current card (after playing a black card)
+    def set_card_color(self, color):
+        state = self.state
+        state.current_card = recolor(state.current_card, color)
+        state.waiting_for_color_choice = False
+        self.post_message(f"Color changed to {color}! Play another card.")
@@ -0,0 +1,325 @@
+# ismcts.py
+# Information Set Monte Carlo Tree Search (single observer). Each iteration
+# deals the cards the bot cannot see -- the other hands and the draw pile --
+# at random and runs one MCTS iteration on that determinization with the
+# engine's own rules. The bot never looks at the other hands, and it works
+# for any number of players.
+import math
+import multiprocessing
+import os
+import random
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, wait
+from itertools import compress
+from engine import Engine
+from aibot import most_common_color, SearchStats
+from tracing import tracer
+
+# A move is a card id to play, or one of these
+DRAW = -1
+PASS = -2  # End the turn (after drawing, or when nothing else is possible)
+
+def legal_moves(engine):
+    """Distinct moves for the current player of an engine"""
+    state = engine.state
+    if state.winner is not None:
+        return []
+    hand = state.player_hands[state.current_player]
+
+    # After drawing, the drawn card (the last one in the hand) may be played
+    if state.has_drawn_card and not state.black_card_played:
+        moves = [hand[-1]] if state.can_play_drawn_card else []
+        moves.append(PASS)
+        return moves
+
+    # Copies of the same card are the same move
+    moves = list(dict.fromkeys(compress(hand, engine.playable_mask(hand))))
+    if state.deck and not state.has_drawn_card:
+        moves.append(DRAW)
+    if not moves:
+        moves.append(PASS)
+    return moves
+
+def apply_move(engine, move):
+    """Play a move from legal_moves() for the current player"""
+    state = engine.state
+    if move == DRAW:
+        engine.draw_from_deck()
+    elif move == PASS:
+        engine.advance_turn()
+    else:
+        hand = state.player_hands[state.current_player]
+        engine.play_card(hand.index(move))
+        # Black cards: pick the most common color in the hand
+        if state.waiting_for_color_choice:
+            engine.set_card_color(most_common_color(hand))
+
+def determinize(state, observer, rng):
+    """Copy of the state with the cards `observer` cannot see dealt at random"""
+    world = state.copy()
+    others = [p for p in world.active_players if p != observer]
+    hidden = list(world.deck)
+    for player in others:
+        hidden.extend(world.player_hands[player])
+    rng.shuffle(hidden)
+    for player in others:
+        size = len(world.player_hands[player])
+        world.player_hands[player] = hidden[len(hidden) - size:]
+        del hidden[len(hidden) - size:]
+    world.deck = hidden
+    return world
+
+def rewards(state):
+    """Reward per player: 1 for the winner, or shared by the leaders if unfinished"""
+    if state.winner is not None:
+        return {p: 1.0 if p == state.winner else 0.0 for p in state.active_players}
+    best = max(info["pos"] for info in state.players.values())
+    leaders = [p for p, info in state.players.items() if info["pos"] == best]
+    return {p: 1.0 / len(leaders) if p in leaders else 0.0 for p in state.active_players}
+
+
+class Node:
+    """
+    Search tree node for the move that led to it. `player` made the move,
+    and `reward` is summed from that player's point of view. `avails` counts
+    how often the move was legal when its parent was visited.
+    """
+    __slots__ = ("move", "parent", "player", "children", "visits", "reward", "avails")
+
+    def __init__(self, move=None, parent=None, player=None):
+        self.move = move
+        self.parent = parent
+        self.player = player
+        self.children = {}
+        self.visits = 0
+        self.reward = 0.0
+        self.avails = 1
+
+    def select(self, moves, exploration):
+        """UCB1 child among the legal `moves` (all of which have a child)"""
+        best = None
+        best_score = float('-inf')
+        for move in moves:
+            child = self.children[move]
+            score = child.reward / child.visits + exploration * math.sqrt(math.log(child.avails) / child.visits)
+            if score > best_score:
+                best_score = score
+                best = child
+            child.avails += 1
+        return best
+
+
+class ISMCTSBot:
+    def __init__(self, game, player_name="AI", seed=None):
+        self.game = game
+        self.player_name = player_name
+        self.rng = random.Random(seed)
+        self.thinking_delay = 1.0
+        self.time_budget = None  # Seconds per move, None to use thinking_delay, 0 for no limit
+        self.max_iterations = 20000  # Iterations per move, None for no limit
+        self.cancelled = False  # Set from another thread to stop the search
+        self.cancel_event = None  # multiprocessing.Event that also stops it, in pool workers
+        self.exploration = 0.7
+        self.rollout_limit = 400  # Moves per rollout before it is scored by position
+        self.iterations = 0
+        self.root = None
+        self.last_move = None
+        self.stats = None  # SearchStats of the last search
+        self.stats_callback = None  # Called with the SearchStats after every search
+
+    def find_best_move(self):
+        """Search until the budget runs out and play the most visited move"""
+        state = self.game.state
+        root_moves = legal_moves(Engine.from_state(state))
+        if not root_moves:  # The game is over
+            return {'type': 'draw'}
+        if len(root_moves) == 1:
+            self.last_move = self._move_to_dict(root_moves[0])
+            return self.last_move
+
+        budget = self.thinking_delay if self.time_budget is None else self.time_budget
+        start = time.perf_counter()
+        visits = self._search(state, budget, self.max_iterations)
+        best = max(root_moves, key=lambda move: visits.get(move, (0, 0.0))[0])
+
+        # Nodes are iterations here; the score is the best move's mean reward
+        stats = SearchStats(self)
+        stats.wall_time = time.perf_counter() - start
+        stats.nodes = self.iterations
+        stats.best_move = best
+        count, reward = visits.get(best, (0, 0.0))
+        stats.score = reward / count if count else None
+        self.stats = stats
+        if self.stats_callback is not None:
+            self.stats_callback(stats)
+        tracer.complete(f"{type(self).__name__}.find_best_move", "search", start, time.perf_counter(),
+                        {'player': self.player_name, 'iterations': self.iterations})
+
+        self.last_move = self._move_to_dict(best)
+        return self.last_move
+
+    def _search(self, state, budget, max_iterations):
+        """Run the search from `state`; returns {root move: (visits, reward)}"""
+        deadline = time.time() + budget if budget else None
+        self.root = Node()
+        self.iterations = 0
+        while max_iterations is None or self.iterations < max_iterations:
+            if self.cancelled or deadline is not None and time.time() >= deadline:
+                break
+            if self.cancel_event is not None and self.cancel_event.is_set():
+                break
+            self._iterate(self.root, state)
+            self.iterations += 1
+        return {move: (child.visits, child.reward) for move, child in self.root.children.items()}
+
+    def _iterate(self, root, state):
+        rng = self.rng
+        engine = Engine.from_state(determinize(state, self.player_name, rng), rng)
+        world = engine.state
+        node = root
+        moves = legal_moves(engine)
+
+        # Selection, then expansion of one untried move
+        while moves:
+            untried = [m for m in moves if m not in node.children]
+            if untried:
+                move = rng.choice(untried)
+                for m in moves:
+                    if m in node.children:
+                        node.children[m].avails += 1
+                child = Node(move, node, world.current_player)
+                node.children[move] = child
+                apply_move(engine, move)
+                node = child
+                moves = legal_moves(engine)
+                break
+            node = node.select(moves, self.exploration)
+            apply_move(engine, node.move)
+            moves = legal_moves(engine)
+
+        # Random rollout
+        steps = 0
+        while moves and steps < self.rollout_limit:
+            apply_move(engine, rng.choice(moves))
+            moves = legal_moves(engine)
+            steps += 1
+
+        # Backpropagation
+        result = rewards(world)
+        while node is not None:
+            node.visits += 1
+            if node.player is not None:
+                node.reward += result[node.player]
+            node = node.parent
+
+    def _move_to_dict(self, move):
+        if move == DRAW or move == PASS:
+            return {'type': 'draw'}
+        hand = self.game.state.player_hands[self.player_name]
+        index = hand.index(move)
+        return {'type': 'play', 'card_index': index, 'card': move}
+
+    def choose_color(self):
+        """Choose the most common color in the hand"""
+        return most_common_color(self.game.state.player_hands[self.player_name])
+
+
+# Root parallelization: every worker process searches its own tree from its
+# own determinizations and the root visit counts are summed. A search that is
+# cancelled sets the pool's event, which stops the workers' searches too.
+CANCEL_POLL_SECONDS = 0.01  # How often a parallel search checks whether it was cancelled
+
+_cancel_event = None  # The pool's event, in a worker process
+
+def _init_worker(cancel_event):
+    global _cancel_event
+    _cancel_event = cancel_event
+
+def _warm_up():
+    return os.getpid()
+
+def _search_worker(state, player_name, seed, budget, max_iterations, exploration, rollout_limit):
+    bot = ISMCTSBot(None, player_name, seed)
+    bot.cancel_event = _cancel_event
+    bot.exploration = exploration
+    bot.rollout_limit = rollout_limit
+    return bot._search(state, budget, max_iterations), bot.iterations
+
+
+class ParallelISMCTSBot(ISMCTSBot):
+    """
+    ISMCTSBot that searches on a pool of worker processes. The pool is
+    started and warmed up once, so a move pays no startup cost. Workers are
+    forked (main.py cannot be re-imported by a spawned process); where fork
+    is not available the search runs serially.
+    """
+
+    def __init__(self, game, player_name="AI", seed=None, workers=None):
+        super().__init__(game, player_name, seed)
+        if "fork" in multiprocessing.get_all_start_methods():
+            self.workers = workers or os.cpu_count() or 1
+        else:
+            self.workers = 1
+        self.pool = None
+        # Copies of the bot (see background.py) share the pool; one search
+        # at a time uses it, so a cancelled one cannot stop the next
+        self.pool_lock = threading.Lock()
+
+    def warm_up(self):
+        """Start the worker processes now rather than on the first move"""
+        if self.pool is None and self.workers > 1:
+            context = multiprocessing.get_context("fork")
+            self.cancel_event = context.Event()
+            self.pool = ProcessPoolExecutor(self.workers, mp_context=context,
+                                            initializer=_init_worker, initargs=(self.cancel_event,))
+            for future in [self.pool.submit(_warm_up) for _ in range(self.workers)]:
+                future.result()
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+
+    def _search(self, state, budget, max_iterations):
+        if self.workers <= 1:
+            return super()._search(state, budget, max_iterations)
+        # The budget runs from now, even while a cancelled search (such as
+        # a ponder) is still letting go of the pool
+        deadline = time.time() + budget if budget else None
+        with self.pool_lock:
+            if self.cancelled:
+                self.iterations = 0
+                return {}
+            if deadline is not None:
+                budget = max(deadline - time.time(), 0.001)
+            return self._search_pool(state, budget, max_iterations)
+
+    def _search_pool(self, state, budget, max_iterations):
+        self.warm_up()
+        if max_iterations is not None:
+            max_iterations = -(-max_iterations // self.workers)
+        futures = [
+            self.pool.submit(_search_worker, state, self.player_name, self.rng.getrandbits(32),
+                             budget, max_iterations, self.exploration, self.rollout_limit)
+            for _ in range(self.workers)
+        ]
+
+        # Wait for the workers, stopping them if the search is cancelled meanwhile
+        pending = futures
+        while pending:
+            pending = wait(pending, timeout=CANCEL_POLL_SECONDS).not_done
+            if pending and self.cancelled:
+                self.cancel_event.set()
+        self.cancel_event.clear()
+
+        # Merge the root statistics of all workers
+        merged = {}
+        self.iterations = 0
+        for future in futures:
+            visits, iterations = future.result()
+            self.iterations += iterations
+            for move, (count, reward) in visits.items():
+                total = merged.get(move, (0, 0.0))
+                merged[move] = (total[0] + count, total[1] + reward)
+        return merged
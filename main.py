@@ -1,18 +1,41 @@
 import pygame
 import random
 import math
+import sys
 import time
-import copy
-from cards import generate_uno_deck
+from collections import OrderedDict
+from engine import Engine, ROWS as DEFAULT_ROWS, COLS as DEFAULT_COLS
+from board import parse_board_size
+from cards import card_text, CARD_COLOR_NAME, CARD_LABEL_NAME
+from aibot import AIBot
+from ismcts import ISMCTSBot, ParallelISMCTSBot
+from background import BackgroundSearch
+from ponder import Ponderer, position_key
+from camera import Camera
+from profiler import FrameProfiler
+from tracing import tracer
 
 # Initialize Pygame
 pygame.init()
 WIDTH, HEIGHT = 1280, 720
-ROWS, COLS = 10, 10
-CELL_WIDTH = WIDTH // COLS
+
+# Board size, e.g. --board 50x50 for a long game. At most VISIBLE_CELLS
+# rows and columns are shown at zoom 1.0; larger boards scroll.
+def board_size():
+    if "--board" not in sys.argv:
+        return DEFAULT_ROWS, DEFAULT_COLS
+    index = sys.argv.index("--board") + 1
+    try:
+        return parse_board_size(sys.argv[index] if index < len(sys.argv) else "")
+    except ValueError as e:
+        sys.exit(f"--board: {e}")
+
+ROWS, COLS = board_size()
+VISIBLE_CELLS = 10
+CELL_WIDTH = WIDTH // min(COLS, VISIBLE_CELLS)
 BOARD_HEIGHT_RATIO = 0.7
 BOARD_HEIGHT = int(HEIGHT * BOARD_HEIGHT_RATIO)
-CELL_HEIGHT = BOARD_HEIGHT // ROWS
+CELL_HEIGHT = BOARD_HEIGHT // min(ROWS, VISIBLE_CELLS)
 screen = pygame.display.set_mode((WIDTH, HEIGHT), pygame.FULLSCREEN)
 pygame.display.set_caption("Game Board")
 # Define color palette with more vibrant colors
@@ -42,25 +65,13 @@ PLAYER_GRADIENTS = {
     "Player4": [(255, 230, 100), (200, 160, 30)], # Yellow gradient
 }
 
-# Game state variables
-players = {
-    "Player1": {"symbol": "🔴", "pos": 1, "target_pos": (0, 0), "skip_turn": False},
-    "AI": {"symbol": "🔵", "pos": 1, "target_pos": (0, 0), "skip_turn": False},
-    "Player3": {"symbol": "🟢", "pos": 1, "target_pos": (0, 0), "skip_turn": False},
-    "Player4": {"symbol": "🟡", "pos": 1, "target_pos": (0, 0), "skip_turn": False},
-}
-
-active_players = ["Player1", "AI"]  # Can be expanded to include Player3 and Player4
-current_player_idx = 0
-current_player = active_players[current_player_idx]
-game_direction = 1  # 1 for normal order, -1 for reversed
+# Game state lives in the headless engine; this module only renders it
+game = Engine(["Player1", "AI"], ROWS, COLS)  # Can be expanded to include Player3 and Player4
+state = game.state
 move_animation = False
 animation_start_time = 0
 animation_duration = 0.5  # seconds
 animation_card = None
-black_card_played = False
-has_drawn_card = False  # Flag to track if the current player has drawn a card this turn
-can_play_drawn_card = False  # Flag to track if the drawn card can be played
 
 # Load fonts with better sizes
 pygame.font.init()
@@ -70,194 +81,251 @@ card_font = pygame.font.Font(None, 40)
 title_font = pygame.font.Font(None, 48)
 message_font = pygame.font.Font(None, 36)
 
-# Grid setup (snakes and ladders style)
-def create_index_grid():
-    grid = [[0] * COLS for _ in range(ROWS)]
-    index = 1
-    for row in range(ROWS-1, -1, -1):  # Start from bottom row
-        direction = range(COLS) if (ROWS-1-row) % 2 == 0 else reversed(range(COLS))
-        for col in direction:
-            grid[row][col] = index
-            index += 1
-    return grid
-
-index_grid = create_index_grid()
+# Grid setup (snakes and ladders style), shared with the engine
+board = state.board
 
 # Create a colorful board
-color_grid = [
-    [
-        random.choice([(name, rgb) for name, rgb in COLORS.items() 
-                     if name not in ["Black", "Background", "BoardBorder", "GridLine"]])
-        for _ in range(COLS)
-    ]
-    for _ in range(ROWS)
-]
-
-# Get UNO deck and remove 0 cards
-def get_filtered_deck():
-    deck = generate_uno_deck()
-    # Filter out all "0" cards
-    filtered_deck = [card for card in deck if card["label"] != "0"]
-    return filtered_deck
-
-# UNO deck without 0 cards
-deck = get_filtered_deck()
-random.shuffle(deck)
-player_hands = {player: [deck.pop() for _ in range(7)] for player in active_players}
-current_card = deck.pop()
-# Make sure the starting card is not a special card
-while not current_card["label"].isdigit():
-    deck.append(current_card)
-    random.shuffle(deck)
-    current_card = deck.pop()
-
-# Function to get row and column from position number
-def get_row_col_from_pos(pos):
-    pos = max(1, min(pos, ROWS * COLS))  # Ensure position is within bounds
-    pos -= 1  # Convert to 0-indexed
-    
-    for row in range(ROWS):
-        for col in range(COLS):
-            if index_grid[row][col] == pos + 1:
-                return row, col
-    
-    return 0, 0  # Default position if not found
+cell_colors = [(name, rgb) for name, rgb in COLORS.items()
+               if name not in ["Black", "Background", "BoardBorder", "GridLine"]]
+color_grid = [[random.choice(cell_colors) for _ in range(COLS)] for _ in range(ROWS)]
+
+# The board is drawn through a camera that follows the current player.
+# The cells never change during a game, so they are rendered in tiles of
+# TILE_CELLS x TILE_CELLS cells, once per zoom level, and each frame only
+# blits the tiles in view. Call invalidate_board_tiles() when the window
+# size or the board changes.
+board_y_offset = 70  # Padding from the top
+BOARD_RECT = pygame.Rect(0, board_y_offset, WIDTH, BOARD_HEIGHT)
+TILE_CELLS = 8
+# Least recently used tiles are dropped beyond this many bytes of pixels; a
+# tile's size grows with the zoom, so the cache is not bounded by count
+MAX_TILE_BYTES = 256 << 20
+camera = Camera(board, WIDTH, BOARD_HEIGHT, CELL_WIDTH, CELL_HEIGHT)
+board_tiles = OrderedDict()
+board_tile_bytes = 0
+board_version = 0
+
+def render_board_tile(tile_row, tile_col):
+    cell_width, cell_height = camera.cell_width, camera.cell_height
+    row0, col0 = tile_row * TILE_CELLS, tile_col * TILE_CELLS
+    rows = range(row0, min(row0 + TILE_CELLS, ROWS))
+    cols = range(col0, min(col0 + TILE_CELLS, COLS))
+    tile = new_sprite(len(cols) * cell_width, len(rows) * cell_height)
+    labels = cell_width >= 60 and cell_height >= 40  # Too small to read otherwise
+
+    # Drawing the board cells
+    for row in rows:
+        for col in cols:
+            color_name, color_val = color_grid[row][col]
+            rect_x = (col - col0) * cell_width
+            rect_y = (row - row0) * cell_height
 
-# Update player positions based on their position number
-for player in players:
-    pos = players[player]["pos"]
-    row, col = get_row_col_from_pos(pos)
-    players[player]["target_pos"] = (row, col)
+            # Cell with rounded corners
+            pygame.draw.rect(tile, color_val,
+                             (rect_x + 2, rect_y + 2, cell_width - 4, cell_height - 4),
+                             border_radius=5)
+
+            # Cell index and color name
+            if labels:
+                name = small_font.render(color_name, True, (0, 0, 0))
+                idx = index_font.render(str(board.position(row, col)), True, (0, 0, 0))
+
+                tile.blit(name, name.get_rect(center=(rect_x + cell_width // 2, rect_y + cell_height // 2 + 10)))
+                tile.blit(idx, (rect_x + 8, rect_y + 8))
+
+    # Draw grid lines between cells (a line on a tile edge is half in each tile)
+    width, height = tile.get_size()
+    for col in range(max(col0, 1), min(cols.stop + 1, COLS)):
+        x = (col - col0) * cell_width
+        pygame.draw.line(tile, COLORS["GridLine"], (x, 0), (x, height), 2)
+    for row in range(max(row0, 1), min(rows.stop + 1, ROWS)):
+        y = (row - row0) * cell_height
+        pygame.draw.line(tile, COLORS["GridLine"], (0, y), (width, y), 2)
+    return tile
+
+def surface_bytes(surface):
+    width, height = surface.get_size()
+    return width * height * surface.get_bytesize()
+
+def board_tile(tile_row, tile_col):
+    global board_tile_bytes
+    key = (camera.zoom_index, tile_row, tile_col)
+    tile = board_tiles.get(key)
+    if tile is None:
+        tile = board_tiles[key] = render_board_tile(tile_row, tile_col)
+        board_tile_bytes += surface_bytes(tile)
+        while board_tile_bytes > MAX_TILE_BYTES and len(board_tiles) > 1:
+            board_tile_bytes -= surface_bytes(board_tiles.popitem(last=False)[1])
+    else:
+        board_tiles.move_to_end(key)
+    return tile
+
+def draw_board():
+    # Draw board background
+    pygame.draw.rect(screen, (220, 220, 240), BOARD_RECT, border_radius=5)
+
+    # Draw border around the board
+    pygame.draw.rect(screen, COLORS["BoardBorder"], BOARD_RECT, 4, border_radius=5)
+
+    # The tiles in view
+    tile_width = TILE_CELLS * camera.cell_width
+    tile_height = TILE_CELLS * camera.cell_height
+    screen.set_clip(BOARD_RECT)
+    screen.blits([(board_tile(tile_row, tile_col),
+                   (BOARD_RECT.x + tile_col * tile_width - camera.x, BOARD_RECT.y + tile_row * tile_height - camera.y))
+                  for tile_row, tile_col in camera.visible_tiles(TILE_CELLS)], False)
+    screen.set_clip(None)
+
+def invalidate_board_tiles():
+    global board_version, board_tile_bytes
+    board_tiles.clear()
+    board_tile_bytes = 0
+    board_version += 1
+
+# Card sprites. Every card face, the card back and the deck are rendered
+# once, the first time they are needed, and then only blitted. A sprite
+# includes the card's shadow and highlight ring, so it is drawn at
+# (x - CARD_MARGIN, y - CARD_MARGIN) for a card at (x, y).
+CARD_MARGIN = 3
+SPRITE_KEY = (255, 0, 255)  # Transparent color key of the sprites
+card_sprites = {}
+
+def new_sprite(width, height):
+    sprite = pygame.Surface((width, height)).convert()
+    sprite.fill(SPRITE_KEY)
+    sprite.set_colorkey(SPRITE_KEY, pygame.RLEACCEL)
+    return sprite
+
+# Width of the pulsating border of clickable cards: 0 if not clickable, else 2 to 4
+def pulse_width(clickable=True):
+    if not clickable:
+        return 0
+    pulse = (math.sin(frame_ticks * 0.005) + 1) / 2  # 0 to 1
+    return int(2 + pulse * 2)
 
 # Draw a prettier card
-def draw_card(x, y, color, label, selected=False, clickable=False):
+def render_card_face(color, label, selected, ring):
+    sprite = new_sprite(84 + 2 * CARD_MARGIN, 124 + 2 * CARD_MARGIN)
+    x = y = CARD_MARGIN
+
     # Card shadow
-    pygame.draw.rect(screen, (50, 50, 50, 100), (x+3, y+3, 84, 124), border_radius=14)
+    pygame.draw.rect(sprite, (50, 50, 50), (x+3, y+3, 84, 124), border_radius=14)
     
     # Card background
     card_color = COLORS.get(color, (0, 0, 0))
-    pygame.draw.rect(screen, card_color, (x, y, 84, 124), border_radius=14)
+    pygame.draw.rect(sprite, card_color, (x, y, 84, 124), border_radius=14)
     
     # Selection highlight
     if selected:
-        pygame.draw.rect(screen, (255, 255, 255), (x-3, y-3, 90, 130), 3, border_radius=16)
+        pygame.draw.rect(sprite, (255, 255, 255), (x-3, y-3, 90, 130), 3, border_radius=16)
     
-    # Clickable highlight
-    if clickable:
-        # Pulsating border effect
-        pulse = (math.sin(pygame.time.get_ticks() * 0.005) + 1) / 2  # 0 to 1
-        highlight_color = (255, 255, 255)
-        border_width = int(2 + pulse * 2)
-        pygame.draw.rect(screen, highlight_color, 
-                       (x-2, y-2, 88, 128), border_width, border_radius=16)
+    # Clickable highlight (one sprite per width of the pulsating border)
+    if ring:
+        pygame.draw.rect(sprite, (255, 255, 255), (x-2, y-2, 88, 128), ring, border_radius=16)
     
     # Card border
-    pygame.draw.rect(screen, (0, 0, 0), (x, y, 84, 124), 2, border_radius=14)
+    pygame.draw.rect(sprite, (0, 0, 0), (x, y, 84, 124), 2, border_radius=14)
     
     # UNO oval in the middle
     if color != "Black":
-        pygame.draw.ellipse(screen, (255, 255, 255), (x+12, y+30, 60, 80))
-        pygame.draw.ellipse(screen, (0, 0, 0), (x+12, y+30, 60, 80), 2)
+        pygame.draw.ellipse(sprite, (255, 255, 255), (x+12, y+30, 60, 80))
+        pygame.draw.ellipse(sprite, (0, 0, 0), (x+12, y+30, 60, 80), 2)
     
     # Card text
     text_color = (255, 255, 255) if color == "Black" else (0, 0, 0)
     
     # Top left and bottom right label
     small_text = small_font.render(str(label), True, text_color)
-    screen.blit(small_text, (x + 8, y + 8))
-    screen.blit(pygame.transform.rotate(small_text, 180), (x + 76 - small_text.get_width(), y + 116 - small_text.get_height()))
+    sprite.blit(small_text, (x + 8, y + 8))
+    sprite.blit(pygame.transform.rotate(small_text, 180), (x + 76 - small_text.get_width(), y + 116 - small_text.get_height()))
     
     # Middle label
     text_surface = card_font.render(str(label), True, text_color)
     text_rect = text_surface.get_rect(center=(x + 42, y + 70))
-    screen.blit(text_surface, text_rect)
-    
+    sprite.blit(text_surface, text_rect)
+    return sprite
+
+def card_sprite(color, label, selected=False, clickable=False):
+    key = (color, label, selected, pulse_width(clickable))
+    sprite = card_sprites.get(key)
+    if sprite is None:
+        sprite = card_sprites[key] = render_card_face(*key)
+    return sprite
+
+def draw_card(x, y, color, label, selected=False, clickable=False):
+    screen.blit(card_sprite(color, label, selected, clickable), (x - CARD_MARGIN, y - CARD_MARGIN))
     return pygame.Rect(x, y, 84, 124)  # Return the card's rect for click detection
 
 # Draw a card back (for AI's cards)
-def draw_card_back(x, y):
+def draw_back(surface, x, y, logo=True):
     # Card shadow
-    pygame.draw.rect(screen, (50, 50, 50, 100), (x+3, y+3, 84, 124), border_radius=14)
+    pygame.draw.rect(surface, (50, 50, 50), (x+3, y+3, 84, 124), border_radius=14)
     
     # Card back
-    pygame.draw.rect(screen, (50, 50, 150), (x, y, 84, 124), border_radius=14)
+    pygame.draw.rect(surface, (50, 50, 150), (x, y, 84, 124), border_radius=14)
     
     # Card border
-    pygame.draw.rect(screen, (0, 0, 0), (x, y, 84, 124), 2, border_radius=14)
+    pygame.draw.rect(surface, (0, 0, 0), (x, y, 84, 124), 2, border_radius=14)
     
     # UNO logo on back
-    pygame.draw.ellipse(screen, (200, 50, 50), (x+12, y+30, 60, 80))
-    pygame.draw.ellipse(screen, (0, 0, 0), (x+12, y+30, 60, 80), 2)
-    text = card_font.render("UNO", True, (255, 255, 255))
-    text_rect = text.get_rect(center=(x + 42, y + 70))
-    screen.blit(text, text_rect)
-    
-    return pygame.Rect(x, y, 84, 124)
+    if logo:
+        pygame.draw.ellipse(surface, (200, 50, 50), (x+12, y+30, 60, 80))
+        pygame.draw.ellipse(surface, (0, 0, 0), (x+12, y+30, 60, 80), 2)
+        text = card_font.render("UNO", True, (255, 255, 255))
+        text_rect = text.get_rect(center=(x + 42, y + 70))
+        surface.blit(text, text_rect)
+
+def card_back_sprite():
+    sprite = card_sprites.get("back")
+    if sprite is None:
+        sprite = card_sprites["back"] = new_sprite(84 + 2 * CARD_MARGIN, 124 + 2 * CARD_MARGIN)
+        draw_back(sprite, CARD_MARGIN, CARD_MARGIN)
+    return sprite
+
+# Draw the deck of cards (face down), as a sprite drawn at (x - CARD_MARGIN, y - 6 - CARD_MARGIN)
+def render_deck(ring):
+    sprite = new_sprite(90 + 2 * CARD_MARGIN, 130 + 2 * CARD_MARGIN)
+    x, y = CARD_MARGIN, 6 + CARD_MARGIN
 
-# Draw the deck of cards (face down)
-def draw_deck(x, y, clickable=True):
     # Draw multiple stacked cards to give depth
     for i in range(3):
         offset = i * 3
-        # Shadow
-        pygame.draw.rect(screen, (50, 50, 50, 100), 
-                       (x+3+offset, y+3-offset, 84, 124), 
-                       border_radius=14)
-        
-        # Card back
-        pygame.draw.rect(screen, (50, 50, 150), 
-                       (x+offset, y-offset, 84, 124), 
-                       border_radius=14)
-        
-        # Card border
-        pygame.draw.rect(screen, (0, 0, 0), 
-                       (x+offset, y-offset, 84, 124), 
-                       2, border_radius=14)
-        
-        # UNO logo on back
-        if i == 2:  # Only on top card
-            pygame.draw.ellipse(screen, (200, 50, 50), (x+12+offset, y+30-offset, 60, 80))
-            pygame.draw.ellipse(screen, (0, 0, 0), (x+12+offset, y+30-offset, 60, 80), 2)
-            text = card_font.render("UNO", True, (255, 255, 255))
-            text_rect = text.get_rect(center=(x+42+offset, y+70-offset))
-            screen.blit(text, text_rect)
+        draw_back(sprite, x + offset, y - offset, logo=(i == 2))  # Logo only on top card
     
     # Pulsating highlight if clickable and deck not empty
-    if clickable and len(deck) > 0:
-        pulse = (math.sin(pygame.time.get_ticks() * 0.005) + 1) / 2  # 0 to 1
-        highlight_color = (255, 255, 255)
-        border_width = int(2 + pulse * 2)
-        pygame.draw.rect(screen, highlight_color, 
+    if ring:
+        pygame.draw.rect(sprite, (255, 255, 255), 
                        (x+6-2, y-6-2, 88, 128), 
-                       border_width, border_radius=16)
+                       ring, border_radius=16)
+    return sprite
+
+def draw_deck(x, y, clickable=True):
+    key = ("deck", pulse_width(clickable and len(state.deck) > 0))
+    sprite = card_sprites.get(key)
+    if sprite is None:
+        sprite = card_sprites[key] = render_deck(key[1])
+    screen.blit(sprite, (x - CARD_MARGIN, y - 6 - CARD_MARGIN))
     
     # Display deck count
-    count_text = index_font.render(f"{len(deck)} cards", True, (255, 255, 255))
+    count_text = index_font.render(f"{len(state.deck)} cards", True, (255, 255, 255))
     screen.blit(count_text, (x + 42 - count_text.get_width() // 2, y + 130))
     
     return pygame.Rect(x+6, y-6, 84, 124)  # Return the top card's rect for click detection
 
 # Draw a prettier player piece
-def draw_player(player_name, row, col, offset=(0, 0)):
-    # Calculate center position of the cell
-    base_x = col * CELL_WIDTH + CELL_WIDTH // 2
-    base_y = row * CELL_HEIGHT + CELL_HEIGHT // 2 + board_y_offset
-    
-    # Apply offset for multiple players in same cell
-    x = base_x + offset[0]
-    y = base_y + offset[1]
-    
-    radius = min(CELL_WIDTH, CELL_HEIGHT) // 4
-    
+def render_player_token(player_name, radius, current):
+    # Token centered at (x, y), with room for the glow and the shadow
+    x = y = radius + 5
+    sprite = pygame.Surface((2 * x + 3, 2 * y + 3), pygame.SRCALPHA)
+
     # Highlight current player
-    if player_name == current_player:
+    if current:
         glow_radius = radius + 5
         for i in range(3):
-            alpha = 150 - i * 50
-            pygame.draw.circle(screen, (*PLAYER_COLORS[player_name], alpha), (x, y), glow_radius - i)
+            pygame.draw.circle(sprite, PLAYER_COLORS[player_name], (x, y), glow_radius - i)
     
     # Draw shadow
-    pygame.draw.circle(screen, (50, 50, 50, 100), (x+2, y+2), radius)
+    pygame.draw.circle(sprite, (50, 50, 50), (x+2, y+2), radius)
     
     # Draw gradient piece
     colors = PLAYER_GRADIENTS[player_name]
@@ -266,15 +334,57 @@ def draw_player(player_name, row, col, offset=(0, 0)):
         r = int(colors[0][0] * ratio + colors[1][0] * (1 - ratio))
         g = int(colors[0][1] * ratio + colors[1][1] * (1 - ratio))
         b = int(colors[0][2] * ratio + colors[1][2] * (1 - ratio))
-        pygame.draw.circle(screen, (r, g, b), (x, y), i)
+        pygame.draw.circle(sprite, (r, g, b), (x, y), i)
     
     # Draw border
-    pygame.draw.circle(screen, (0, 0, 0), (x, y), radius, 2)
+    pygame.draw.circle(sprite, (0, 0, 0), (x, y), radius, 2)
     
     # Draw player number inside
     text = small_font.render(player_name[-1], True, (255, 255, 255))
     text_rect = text.get_rect(center=(x, y))
-    screen.blit(text, text_rect)
+    sprite.blit(text, text_rect)
+    return sprite
+
+# Tokens are rendered once per player, cell size and highlight
+player_sprites = {}
+
+def token_center(pos, offset=(0, 0)):
+    # Center of the cell in view, plus the offset for multiple players in same cell
+    xs, ys = camera.centers()
+    return (BOARD_RECT.x + xs[pos] - camera.x + offset[0],
+            BOARD_RECT.y + ys[pos] - camera.y + offset[1])
+
+def token_radius():
+    return max(3, min(camera.cell_width, camera.cell_height) // 4)
+
+def token_rect(pos, offset=(0, 0)):
+    """Screen rect covered by a token sprite"""
+    x, y = token_center(pos, offset)
+    margin = token_radius() + 5
+    return pygame.Rect(x - margin, y - margin, 2 * margin + 3, 2 * margin + 3)
+
+def draw_player(player_name, pos, offset=(0, 0)):
+    x, y = token_center(pos, offset)
+    radius = token_radius()
+    key = (player_name, radius, player_name == state.current_player)
+    sprite = player_sprites.get(key)
+    if sprite is None:
+        sprite = player_sprites[key] = render_player_token(*key)
+    screen.blit(sprite, (x - radius - 5, y - radius - 5))
+
+# (player, position, offset) of every token; players on the same cell are offset
+def player_cells():
+    # Group players by position to handle overlapping
+    positions = {}
+    for player in state.active_players:
+        positions.setdefault(board.clamp(state.players[player]["pos"]), []).append(player)
+
+    cells = []
+    for pos, player_list in positions.items():
+        offsets = get_player_offsets(len(player_list))
+        for i, player in enumerate(player_list):
+            cells.append((player, pos, offsets[i]))
+    return cells
 
 # Calculate positions to avoid overlap when multiple players on same cell
 def get_player_offsets(player_count):
@@ -287,36 +397,6 @@ def get_player_offsets(player_count):
     else:  # 4 or more
         return [(-12, -12), (12, -12), (-12, 12), (12, 12)]
 
-# Check if a card can be played on the current card
-def can_play_card(card):
-    global black_card_played
-    
-    # If a black card was just played, any card can be played
-    if black_card_played:
-        return True
-    
-    # Number cards
-    if card["label"].isdigit() and current_card["label"].isdigit():
-        return card["label"] == current_card["label"] or card["color"] == current_card["color"]
-    
-    # Same action card
-    if card["label"] == current_card["label"]:
-        return True
-    
-    # Same color
-    if card["color"] == current_card["color"]:
-        return True
-    
-    # Black cards can be played on anything
-    if card["color"] == "Black":
-        return True
-    
-    # Current card is black
-    if current_card["color"] == "Black":
-        return True
-    
-    return False
-
 # Draw color selection buttons
 def draw_color_selection():
     button_width = 100
@@ -350,666 +430,210 @@ def draw_color_selection():
     
     return color_buttons
 
-# Handle the effects of playing a card
-def apply_card_effect(card, player_idx):
-    global current_player_idx, game_direction, message, waiting_for_color_choice, black_card_played
-    
-    # If it's a number card, move the player
-    if card["label"].isdigit():
-        steps = int(card["label"])
-        players[active_players[player_idx]]["pos"] += steps
-        message = f"{active_players[player_idx]} moves {steps} steps"
-    
-    # Special cards
-    elif card["label"] == "Skip":
-        next_player_idx = (player_idx + game_direction) % len(active_players)
-        players[active_players[next_player_idx]]["skip_turn"] = True
-        message = f"{active_players[next_player_idx]} turn skipped!"
-    
-    elif card["label"] == "Reverse":
-        # Modified: Reverse now works as Skip
-        next_player_idx = (player_idx + game_direction) % len(active_players)
-        players[active_players[next_player_idx]]["skip_turn"] = True
-        message = f"Reverse used as Skip! {active_players[next_player_idx]} turn skipped!"
-    
-    elif card["label"].startswith("Draw"):
-        next_player_idx = (player_idx + game_direction) % len(active_players)
-        draw_count = int(card["label"].split()[1])
-        next_player = active_players[next_player_idx]
-        
-        # Draw cards make the next player move backward (whether colored or black)
-        players[next_player]["pos"] = max(1, players[next_player]["pos"] - draw_count)
-        # Update target position immediately
-        row, col = get_row_col_from_pos(players[next_player]["pos"])
-        players[next_player]["target_pos"] = (row, col)
-        
-        # For black Draw cards, the current player gets to play again
-        if card["color"] == "Black":
-            message = f"{next_player} moves back {draw_count} steps! {current_player} gets another turn!"
-            black_card_played = True
-            waiting_for_color_choice = True
-        else:
-            message = f"{next_player} moves back {draw_count} steps!"
-            # For colored Draw cards, the next player also draws cards
-            for _ in range(min(draw_count, len(deck))):
-                if deck:
-                    player_hands[next_player].append(deck.pop())
-            message += f" and draws {draw_count} cards!"
-    
-    # Make sure position is within bounds
-    players[active_players[player_idx]]["pos"] = max(1, min(players[active_players[player_idx]]["pos"], ROWS * COLS))
-    
-    # Update player's target position
-    row, col = get_row_col_from_pos(players[active_players[player_idx]]["pos"])
-    players[active_players[player_idx]]["target_pos"] = (row, col)
-    
-    # Check for win condition
-    if players[active_players[player_idx]]["pos"] >= ROWS * COLS:
-        message = f"{active_players[player_idx]} WINS!"
-        return True
-    
-    return False
-
-# Get the next player's turn
-def advance_turn():
-    global current_player_idx, current_player, message_timer, black_card_played, has_drawn_card, can_play_drawn_card
-    
-    # Reset black card flag when advancing turn
-    black_card_played = False
-    
-    # Reset the has_drawn_card flag for the new turn
-    has_drawn_card = False
-    can_play_drawn_card = False
-    
-    next_idx = (current_player_idx + game_direction) % len(active_players)
-    
-    # Skip players who have a skip_turn flag
-    while players[active_players[next_idx]]["skip_turn"]:
-        players[active_players[next_idx]]["skip_turn"] = False  # Reset the skip flag
-        message = f"{active_players[next_idx]}'s turn is skipped!"
-        message_timer = 120  # Show message for 2 seconds
-        next_idx = (next_idx + game_direction) % len(active_players)
-    
-    current_player_idx = next_idx
-    current_player = active_players[current_player_idx]
-
-# Play a selected card from the player's hand
+# Play a card through the engine and start the card animation
 def play_card(card_idx):
-    global current_card, move_animation, animation_start_time, animation_card, message_timer, waiting_for_color_choice, black_card_played, has_drawn_card, can_play_drawn_card
-    
-    card = player_hands[current_player][card_idx]
-    
-    # Check if the card can be played
-    if can_play_card(card):
-        # Remove card from hand
-        player_hands[current_player].pop(card_idx)
-        
-        # Set animation
+    global move_animation, animation_start_time, animation_card
+
+    card = state.player_hands[state.current_player][card_idx]
+    if game.play_card(card_idx):
         animation_card = card
         move_animation = True
         animation_start_time = time.time()
-        
-        # Apply card effect
-        game_over = apply_card_effect(card, current_player_idx)
-        
-        # Update the current card after animation finishes
-        current_card = card
-        
-        # Set message timer
-        message_timer = 120  # Show message for 2 seconds
-        
-        # Check if the game is over
-        if game_over:
-            return
-        
-        # Check if hand is empty (player wins)
-        if len(player_hands[current_player]) == 0:
-            message = f"{current_player} WINS!"
-            message_timer = 300  # Show message for 5 seconds
-            return
-        
-        # If we're waiting for color choice, don't advance turn
-        if waiting_for_color_choice:
-            return
-        
-        # If black card was played and this is the second card, now advance turn
-        if black_card_played:
-            black_card_played = False
-            advance_turn()
-            return
-        
-        # Advance to the next player for normal cards
-        advance_turn()
-        
-        # If the next player's hand is empty, draw a card
-        if len(player_hands[current_player]) == 0:
-            if deck:
-                player_hands[current_player].append(deck.pop())
-    else:
-        message = "Can't play that card!"
-        message_timer = 120  # Show message for 2 seconds
-
-# Draw a card from the deck for the current player
-def draw_from_deck():
-    global message, message_timer, black_card_played, has_drawn_card, can_play_drawn_card
-    
-    # Check if player has already drawn a card this turn
-    if has_drawn_card:
-        message = "Picking cards again not allowed!"
-        message_timer = 120
-        # End the player's turn if they try to draw again
-        if not black_card_played:
-            advance_turn()
-        return
-    
-    if len(deck) > 0:
-        # Mark that player has drawn a card this turn
-        has_drawn_card = True
-        
-        # Add card to player's hand
-        new_card = deck.pop()
-        player_hands[current_player].append(new_card)
-        
-        message = f"{current_player} draws a card"
-        message_timer = 120
-        
-        # Check if the drawn card can be played
-        if can_play_card(new_card):
-            message += " - you can play it!"
-            can_play_drawn_card = True
-            # Allow player to play the drawn card if possible
-            # But don't advance turn yet to give them a chance to play it
-            return
-        else:
-            # If card can't be played and not after black card, advance turn
-            if not black_card_played:
-                advance_turn()
-    else:
-        message = "Deck is empty!"
-        message_timer = 120
-
-# Set a color for the current card (after playing a black card)
-def set_card_color(color):
-    global current_card, waiting_for_color_choice, message, message_timer
-    
-    # Update the current card's color
-    current_card["color"] = color
-    waiting_for_color_choice = False
-    
-    message = f"Color changed to {color}! Play another card."
-    message_timer = 120
 
 # Global variables
-message = ""
-message_timer = 0
 ai_thinking = False
-waiting_for_color_choice = False
-
-# Constants for evaluation
-MAX_DEPTH = 3  # Depth of the search tree
-
-# Clean implementation of the AI Bot class with Minimax and Alpha-Beta Pruning
-class AIBot:
-    def __init__(self, player_name="AI"):
-        self.player_name = player_name
-        self.thinking_delay = 1.0
-        self.max_depth = 2  # Reduced depth for better performance
-        self.last_move = None
-
-    def find_best_move(self):
-        """Find the best move with safety checks"""
-        try:
-            game_state = self._create_game_state()
-            possible_moves = self._get_possible_moves(game_state)
-            
-            if not possible_moves:
-                return {'type': 'draw'}
-            
-            # Safety check - verify all card indices are valid
-            valid_moves = []
-            for move in possible_moves:
-                if move['type'] == 'play':
-                    hand_size = len(game_state['hands'][self.player_name])
-                    if 0 <= move['card_index'] < hand_size:
-                        valid_moves.append(move)
-                else:
-                    valid_moves.append(move)
-            
-            if not valid_moves:
-                return {'type': 'draw'}
-            
-            best_score = float('-inf')
-            best_move = valid_moves[0]  # Default to first valid move
-            alpha = float('-inf')
-            beta = float('inf')
-
-            for move in valid_moves:
-                new_state = self._simulate_move(game_state.copy(), move)
-                score = self._minimax(new_state, self.max_depth - 1, alpha, beta, False)
-                
-                if score > best_score:
-                    best_score = score
-                    best_move = move
-                
-                alpha = max(alpha, best_score)
-                if beta <= alpha:
-                    break
-
-            self.last_move = best_move
-            return best_move
-
-        except Exception as e:
-            print(f"AI error: {e}")
-            # Fallback to simple strategy if Minimax fails
-            return self._fallback_strategy()
-
-    def _fallback_strategy(self):
-        """Simple fallback strategy when Minimax fails"""
-        hand = player_hands[self.player_name]
-        current_card_color = current_card["color"]
-        current_card_label = current_card["label"]
-        
-        # Try to play matching color first
-        for i, card in enumerate(hand):
-            if card["color"] == current_card_color:
-                return {'type': 'play', 'card_index': i, 'card': card}
-        
-        # Then try matching label
-        for i, card in enumerate(hand):
-            if card["label"] == current_card_label:
-                return {'type': 'play', 'card_index': i, 'card': card}
-        
-        # Then wild cards
-        for i, card in enumerate(hand):
-            if card["color"] == "Black":
-                return {'type': 'play', 'card_index': i, 'card': card}
-        
-        # Finally draw if nothing else
-        return {'type': 'draw'}
-
-    def _minimax(self, state, depth, alpha, beta, is_maximizing):
-        """Minimax with safety checks"""
-        try:
-            if depth == 0 or self._is_terminal_state(state):
-                return self._evaluate_state(state, is_maximizing)
-
-            if is_maximizing:
-                max_eval = float('-inf')
-                for move in self._get_possible_moves(state, is_maximizing=True):
-                    new_state = self._simulate_move(state.copy(), move)
-                    eval = self._minimax(new_state, depth - 1, alpha, beta, False)
-                    max_eval = max(max_eval, eval)
-                    alpha = max(alpha, eval)
-                    if beta <= alpha:
-                        break
-                return max_eval
-            else:
-                min_eval = float('inf')
-                for move in self._get_possible_moves(state, is_maximizing=False):
-                    new_state = self._simulate_move(state.copy(), move)
-                    eval = self._minimax(new_state, depth - 1, alpha, beta, True)
-                    min_eval = min(min_eval, eval)
-                    beta = min(beta, eval)
-                    if beta <= alpha:
-                        break
-                return min_eval
-        except Exception as e:
-            print(f"Minimax error: {e}")
-            return 0  # Neutral score if error occurs
-
-    def _simulate_move(self, state, move):
-        """Safer move simulation with validation"""
-        try:
-            current_player = state['current_player']
-            opponent = state['opponent']
-            
-            if move['type'] == 'play':
-                # Validate card index
-                if move['card_index'] >= len(state['hands'][current_player]):
-                    raise IndexError("Invalid card index in simulation")
-                
-                # Remove card from hand
-                card = state['hands'][current_player].pop(move['card_index'])
-                state['current_card'] = card
-
-                # Apply card effects
-                if card["label"].isdigit():
-                    steps = int(card["label"])
-                    state['players_pos'][current_player] += steps
-                elif card["label"] == "Skip":
-                    state['skip_status'][opponent] = True
-                elif card["label"] == "Reverse":
-                    state['game_direction'] *= -1
-                    if len(active_players) == 2:
-                        state['skip_status'][opponent] = True
-                elif card["label"].startswith("Draw"):
-                    draw_count = int(card["label"].split()[1])
-                    state['players_pos'][opponent] = max(1, state['players_pos'][opponent] - draw_count)
-                    if card["color"] != "Black":
-                        draw_amount = min(draw_count, state['deck_size'])
-                        state['deck_size'] -= draw_amount
-
-                # Handle position bounds
-                state['players_pos'][current_player] = max(1, min(state['players_pos'][current_player], ROWS * COLS))
-                state['players_pos'][opponent] = max(1, min(state['players_pos'][opponent], ROWS * COLS))
-
-            elif move['type'] == 'draw':
-                if state['deck_size'] > 0:
-                    state['deck_size'] -= 1
-
-            # Switch turns unless it's a black card that allows another turn
-            if move['type'] != 'play' or move['card']['color'] != "Black":
-                if state['skip_status'][opponent]:
-                    state['skip_status'][opponent] = False
-                else:
-                    state['current_player'], state['opponent'] = state['opponent'], state['current_player']
-
-            return state
-        except Exception as e:
-            print(f"Simulation error: {e}")
-            return state  # Return original state if error occurs
-
-    def _create_game_state(self):
-        """Create a simplified game state for AI evaluation"""
-        return {
-            'hands': {p: player_hands[p].copy() for p in active_players},
-            'current_card': current_card.copy(),
-            'players_pos': {p: players[p]["pos"] for p in active_players},
-            'skip_status': {p: players[p]["skip_turn"] for p in active_players},
-            'deck_size': len(deck),
-            'current_player': self.player_name,
-            'opponent': 'Player1',  # Assuming 2-player game
-            'game_direction': game_direction
-        }
-    
-    def _get_possible_moves(self, state, is_maximizing=True):
-        """Get all possible moves for the current player"""
-        player = state['current_player'] if is_maximizing else state['opponent']
-        moves = []
-        
-        # Check for playable cards
-        for i, card in enumerate(state['hands'][player]):
-            if self._can_play_card(card, state['current_card']):
-                moves.append({
-                    'type': 'play',
-                    'card_index': i,
-                    'card': card
-                })
-        
-        # Always include draw option
-        if state['deck_size'] > 0:
-            moves.append({'type': 'draw'})
-            
-        return moves
-    
-    def _can_play_card(self, card, current_card):
-        """Check if a card can be played on the current card"""
-        # Black cards can be played on anything
-        if card["color"] == "Black":
-            return True
-            
-        # Same color or same label
-        if card["color"] == current_card["color"] or card["label"] == current_card["label"]:
-            return True
-            
-        # Current card is black (with a chosen color)
-        if current_card["color"] == "Black":
-            return True
-            
-        return False
-    
-    def _is_terminal_state(self, state):
-        """Check if the game state is terminal"""
-        # Check if any player has reached the end
-        for player in [state['current_player'], state['opponent']]:
-            if state['players_pos'][player] >= ROWS * COLS:
-                return True
-                
-        # Check if any player has no cards left
-        for player in [state['current_player'], state['opponent']]:
-            if len(state['hands'][player]) == 0:
-                return True
-                
-        return False
-    
-    def _evaluate_state(self, state, is_maximizing):
-        """Evaluate the game state from AI's perspective"""
-        ai_player = state['current_player'] if is_maximizing else state['opponent']
-        human_player = state['opponent'] if is_maximizing else state['current_player']
-        
-        # Position difference
-        position_score = state['players_pos'][ai_player] - state['players_pos'][human_player]
-        
-        # Card advantage
-        card_score = len(state['hands'][human_player]) - len(state['hands'][ai_player])
-        
-        # Distance to goal
-        ai_distance = ROWS * COLS - state['players_pos'][ai_player]
-        human_distance = ROWS * COLS - state['players_pos'][human_player]
-        distance_score = human_distance - ai_distance
-        
-        # Special cards in hand
-        special_card_score = 0
-        for card in state['hands'][ai_player]:
-            if card["label"] == "Skip" or card["label"] == "Reverse":
-                special_card_score += 5
-            elif card["label"].startswith("Draw"):
-                special_card_score += 10
-            elif card["color"] == "Black":
-                special_card_score += 15
-        
-        # Combine scores with weights
-        total_score = (
-            position_score * 3 + 
-            card_score * 2 + 
-            distance_score * 5 + 
-            special_card_score
-        )
-        
-        return total_score
-        
-    def choose_color(self):
-        """Choose the most advantageous color based on AI's hand"""
-        # Count colors in hand
-        color_counts = {"Red": 0, "Blue": 0, "Green": 0, "Yellow": 0}
-        for card in player_hands[self.player_name]:
-            if card["color"] in color_counts:
-                color_counts[card["color"]] += 1
-        
-        # Choose most common color
-        best_color = max(color_counts.items(), key=lambda x: x[1])[0] if any(color_counts.values()) else "Red"
-        return best_color
 
-ai_bot = AIBot("AI")
+# Run with --ismcts to play against the ISMCTS bot, which does not see your hand,
+# or with --parallel to run it on all CPU cores
+if "--parallel" in sys.argv:
+    ai_bot = ParallelISMCTSBot(game, "AI")
+    ai_bot.warm_up()
+elif "--ismcts" in sys.argv:
+    ai_bot = ISMCTSBot(game, "AI")
+else:
+    ai_bot = AIBot(game, "AI")
+
+# The AI searches on a background thread; see ai_play_move(). Unless run
+# with --no-ponder it also searches its replies during the human's turn.
+ai_search = BackgroundSearch(ai_bot)
+ponderer = Ponderer(ai_bot)
+ponder_enabled = "--no-ponder" not in sys.argv
+
+# Numbers of the AI's last search (including pondering), shown over the
+# board while S toggles the overlay on. The searches run on copies of the
+# bot, which keep the callback and call it from their threads.
+show_search_stats = False
+search_stats = None
+
+def record_search_stats(stats):
+    global search_stats
+    search_stats = stats
+
+ai_bot.stats_callback = record_search_stats
+
+STATS_RECT = pygame.Rect(BOARD_RECT.x + 10, BOARD_RECT.top + 10, 330, 190)
+
+def draw_search_stats():
+    panel = pygame.Surface(STATS_RECT.size, pygame.SRCALPHA)
+    panel.fill((255, 255, 255, 220))
+    screen.blit(panel, STATS_RECT.topleft)
+    pygame.draw.rect(screen, (100, 100, 150), STATS_RECT, 2)
+    lines = search_stats.lines() if search_stats is not None else ["No search yet"]
+    y = STATS_RECT.y + 8
+    for line in lines:
+        if y + small_font.get_height() > STATS_RECT.bottom - 4:
+            break
+        screen.blit(small_font.render(line, True, (30, 30, 100)), (STATS_RECT.x + 8, y))
+        y += small_font.get_height() + 2
 
 def ai_make_move():
-    global message, message_timer, ai_thinking, waiting_for_color_choice, current_card, has_drawn_card
+    """Color choices and drawn cards; other moves come from ai_search"""
+    global ai_thinking
 
     # Reset AI thinking flag
     ai_thinking = False
 
     # If waiting for color choice, handle that first
-    if waiting_for_color_choice and current_player == "AI":
+    if state.waiting_for_color_choice and state.current_player == "AI":
         color = ai_bot.choose_color()
-        message = f"AI chooses {color}"
-        message_timer = 120
-        set_card_color(color)
+        game.set_card_color(color)
+        game.post_message(f"AI chooses {color}")
         return
 
     # Check if AI has already drawn a card this turn
-    if has_drawn_card and current_player == "AI":
+    if state.has_drawn_card and state.current_player == "AI":
         # Check if AI can play the card it just drew (the last card in its hand)
-        if len(player_hands["AI"]) > 0:  # Make sure AI has cards
-            last_card_index = len(player_hands["AI"]) - 1
-            last_card = player_hands["AI"][last_card_index]
+        ai_hand = state.player_hands["AI"]
+        if len(ai_hand) > 0:  # Make sure AI has cards
+            last_card_index = len(ai_hand) - 1
+            last_card = ai_hand[last_card_index]
             
             # Only play the card if it's valid according to UNO rules
-            if can_play_card(last_card):
-                message = f"AI plays the drawn card: {last_card['color']} {last_card['label']}"
-                message_timer = 120
+            if game.can_play_card(last_card):
+                game.post_message(f"AI plays the drawn card: {card_text(last_card)}")
                 play_card(last_card_index)
                 return
         
         # If AI can't play the drawn card, end its turn
-        message = "AI ends its turn"
-        message_timer = 120
-        advance_turn()
+        game.post_message("AI ends its turn")
+        game.advance_turn()
         return
 
+# Play the move found by the background search
+def ai_play_move(best_move):
     try:
-        # Find and play best move
-        best_move = ai_bot.find_best_move()
-
         if best_move['type'] == 'play':
             # Additional safety check
-            if best_move['card_index'] < len(player_hands["AI"]):
-                card = player_hands["AI"][best_move['card_index']]
-                message = f"AI plays {card['color']} {card['label']}"
-                message_timer = 120
+            if best_move['card_index'] < len(state.player_hands["AI"]):
+                card = state.player_hands["AI"][best_move['card_index']]
+                game.post_message(f"AI plays {card_text(card)}")
                 play_card(best_move['card_index'])
             else:
-                message = "AI draws a card (invalid play)"
-                message_timer = 120
-                draw_from_deck()
+                game.post_message("AI draws a card (invalid play)")
+                game.draw_from_deck()
         elif best_move['type'] == 'draw':
-            message = "AI draws a card"
-            message_timer = 120
-            draw_from_deck()
+            game.post_message("AI draws a card")
+            game.draw_from_deck()
     except Exception as e:
         print(f"AI error: {e}")
-        message = "AI draws a card (error)"
-        message_timer = 120
-        draw_from_deck()
+        game.post_message("AI draws a card (error)")
+        game.draw_from_deck()
         
 # Function to convert the current game state into a dictionary
 def get_game_state():
     return {
         'hands': {
-            'Player1': player_hands['Player1'][:],
-            'AI': player_hands['AI'][:]
+            'Player1': state.player_hands['Player1'][:],
+            'AI': state.player_hands['AI'][:]
         },
-        'current_card': current_card.copy(),
-        'deck': deck[:]
+        'current_card': state.current_card,
+        'deck': state.deck[:]
     }
 
-# Game loop
-running = True
-clock = pygame.time.Clock()
-selected_card = -1
+# Layout of the panels below the board
+hand_bg_y = BOARD_HEIGHT + board_y_offset + 20
+hand_bg_height = HEIGHT - hand_bg_y - 20
+
+# Redistribute space for hand area, current card, and draw deck
+hand_width = WIDTH * 0.65  # Reduced to make room for deck
+card_area_width = WIDTH * 0.20
+deck_area_width = WIDTH * 0.15
+
+# Draw the whole frame. The event handling uses the rects it sets.
+def draw_frame(now):
+    global card_rects, deck_rect, color_buttons, move_animation
 
-while running:
     screen.fill(COLORS["Background"])
     
-    # Define board area
-    board_y_offset = 70  # Padding from the top
-    
+    # Board background, then the cells and grid lines from the cached tiles
+    draw_board()
+    profiler.lap("draw.board")
+
     # Draw title
     title = title_font.render("UNO Game Board", True, (30, 30, 100))
     screen.blit(title, (WIDTH//2 - title.get_width()//2, 10))
     
     # Draw current player indicator
-    player_text = index_font.render(f"Current Turn: {current_player}", True, PLAYER_COLORS[current_player])
+    player_text = index_font.render(f"Current Turn: {state.current_player}", True, PLAYER_COLORS[state.current_player])
     screen.blit(player_text, (20, 10))
-    
-    # Draw board background
-    pygame.draw.rect(screen, (220, 220, 240), 
-                    (0, board_y_offset, WIDTH, BOARD_HEIGHT), 
-                    border_radius=5)
-    
-    # Draw border around the board
-    pygame.draw.rect(screen, COLORS["BoardBorder"], 
-                    (0, board_y_offset, WIDTH, BOARD_HEIGHT), 
-                    4, border_radius=5)
 
-    # Drawing the board cells
-    for row in range(ROWS):
-        for col in range(COLS):
-            color_name, color_val = color_grid[row][col]
-            rect_x = col * CELL_WIDTH
-            rect_y = row * CELL_HEIGHT + board_y_offset
-            
-            # Cell with rounded corners
-            pygame.draw.rect(screen, color_val, 
-                           (rect_x + 2, rect_y + 2, CELL_WIDTH - 4, CELL_HEIGHT - 4),
-                           border_radius=5)
-            
-            # Cell index and color name
-            name = small_font.render(color_name, True, (0, 0, 0))
-            idx = index_font.render(str(index_grid[row][col]), True, (0, 0, 0))
-            
-            screen.blit(name, name.get_rect(center=(rect_x + CELL_WIDTH // 2, rect_y + CELL_HEIGHT // 2 + 10)))
-            screen.blit(idx, (rect_x + 8, rect_y + 8))
-
-    # Draw grid lines
-    for i in range(1, COLS):
-        pygame.draw.line(screen, COLORS["GridLine"], 
-                      (i * CELL_WIDTH, board_y_offset), 
-                      (i * CELL_WIDTH, BOARD_HEIGHT + board_y_offset), 2)
-    for i in range(1, ROWS):
-        pygame.draw.line(screen, COLORS["GridLine"], 
-                      (0, i * CELL_HEIGHT + board_y_offset), 
-                      (WIDTH, i * CELL_HEIGHT + board_y_offset), 2)
+    # Animated while the AI searches in the background
+    if ai_search.pending:
+        dots = "." * (int(now * 3) % 4)
+        thinking_text = index_font.render(f"AI is thinking{dots}", True, PLAYER_COLORS["AI"])
+        screen.blit(thinking_text, (20, 36))
+    profiler.lap("draw.title")
 
-    # Group players by position to handle overlapping
-    positions = {}
-    for player in active_players:
-        row, col = players[player]["target_pos"]
-        pos_key = (row, col)
-        if pos_key not in positions:
-            positions[pos_key] = []
-        positions[pos_key].append(player)
-    
-    # Draw players with appropriate offsets
-    for pos, player_list in positions.items():
-        row, col = pos
-        offsets = get_player_offsets(len(player_list))
-        for i, player in enumerate(player_list):
-            draw_player(player, row, col, offsets[i])
+    # Draw players, offset where they share a cell
+    screen.set_clip(BOARD_RECT)
+    for player, pos, offset in player_cells():
+        draw_player(player, pos, offset)
+    screen.set_clip(None)
+    profiler.lap("draw.players")
 
-    # Player hand area
-    hand_bg_y = BOARD_HEIGHT + board_y_offset + 20
-    hand_bg_height = HEIGHT - hand_bg_y - 20
-    
-    # Redistribute space for hand area, current card, and draw deck
-    hand_width = WIDTH * 0.65  # Reduced to make room for deck
-    card_area_width = WIDTH * 0.20
-    deck_area_width = WIDTH * 0.15
-    
     # Player hand background
     pygame.draw.rect(screen, (220, 220, 230), 
                    (20, hand_bg_y, hand_width - 30, hand_bg_height), 
                    border_radius=10)
     
     # Player hand label
-    hand_label = index_font.render(f"{current_player}'s Hand", True, (0, 0, 0))
+    hand_label = index_font.render(f"{state.current_player}'s Hand", True, (0, 0, 0))
     screen.blit(hand_label, (hand_width/2 - hand_label.get_width()/2, hand_bg_y + 10))
     
     # Player hand cards
     hand_y = hand_bg_y + 40
-    current_hand = player_hands[current_player]
+    current_hand = state.player_hands[state.current_player]
     card_spacing = min(90, (hand_width - 100) // max(len(current_hand), 1)) if current_hand else 90
     start_x = ((hand_width - 10) - ((len(current_hand) - 1) * card_spacing + 84)) // 2 if current_hand else (hand_width - 10) // 2 - 42
     
     card_rects = []
+    card_blits = []
     
     # Only show actual cards for Player1, show card backs for AI
-    if current_player == "Player1":
+    if state.current_player == "Player1":
         # Show Player1's cards normally when it's their turn
+        playable = game.playable_mask(current_hand)
         for i, card in enumerate(current_hand):
             is_selected = (i == selected_card)
-            is_playable = can_play_card(card)
-            card_rect = draw_card(start_x + i * card_spacing, hand_y, card["color"], card["label"], 
-                               selected=is_selected, clickable=is_playable)
-            card_rects.append(card_rect)
+            is_playable = playable[i]
+            sprite = card_sprite(CARD_COLOR_NAME[card], CARD_LABEL_NAME[card], is_selected, is_playable)
+            card_x = start_x + i * card_spacing
+            card_blits.append((sprite, (card_x - CARD_MARGIN, hand_y - CARD_MARGIN)))
+            card_rects.append(pygame.Rect(card_x, hand_y, 84, 124))
+        screen.blits(card_blits, False)
     else:
         # For AI, show card backs
+        sprite = card_back_sprite()
         for i in range(len(current_hand)):
-            card_rect = draw_card_back(start_x + i * card_spacing, hand_y)
-            card_rects.append(card_rect)
+            card_x = start_x + i * card_spacing
+            card_blits.append((sprite, (card_x - CARD_MARGIN, hand_y - CARD_MARGIN)))
+            card_rects.append(pygame.Rect(card_x, hand_y, 84, 124))
+        screen.blits(card_blits, False)
         
         # Show count text
         count_text = index_font.render(f"{len(current_hand)} cards", True, (0, 0, 0))
         screen.blit(count_text, (hand_width/2 - count_text.get_width()/2, hand_y + 130))
+    profiler.lap("draw.hand")
     
     # Current card panel
     current_card_x = hand_width
@@ -1039,12 +663,13 @@ while running:
     
     # Draw the draw deck - only clickable if it's Player1's turn
     deck_rect = draw_deck(deck_x + (deck_area_width - 10) / 2 - 42, hand_y,
-                    clickable=(current_player == "Player1"))
+                    clickable=(state.current_player == "Player1"))
+    profiler.lap("draw.deck")
     
     # Draw the current card (with animation if active)
-    if move_animation and time.time() - animation_start_time < animation_duration:
+    if move_animation and now - animation_start_time < animation_duration:
         # Calculate animation progress (0 to 1)
-        progress = (time.time() - animation_start_time) / animation_duration
+        progress = (now - animation_start_time) / animation_duration
         
         # Start position (from hand)
         start_x = WIDTH // 2
@@ -1059,7 +684,7 @@ while running:
         anim_y = start_y - 50 * math.sin(math.pi * progress)  # Arc motion
         
         # Draw the animating card
-        draw_card(anim_x, anim_y, animation_card["color"], animation_card["label"])
+        draw_card(anim_x, anim_y, CARD_COLOR_NAME[animation_card], CARD_LABEL_NAME[animation_card])
         
         # Check if animation is done
         if progress >= 1.0:
@@ -1067,16 +692,16 @@ while running:
     else:
         # Draw the regular current card
         card_x = current_card_x + (card_area_width - 10) / 2 - 42  # Center the card
-        draw_card(card_x, hand_y, current_card["color"], current_card["label"])
+        draw_card(card_x, hand_y, CARD_COLOR_NAME[state.current_card], CARD_LABEL_NAME[state.current_card])
+    profiler.lap("draw.card")
     
     # Display color selection if waiting for choice (only for Player1)
-    if waiting_for_color_choice and current_player == "Player1":
+    if state.waiting_for_color_choice and state.current_player == "Player1":
         color_buttons = draw_color_selection()
     
     # Display message if timer is active
-    if message_timer > 0:
-        message_timer -= 1
-        message_surface = message_font.render(message, True, (30, 30, 100))
+    if state.message_timer > 0:
+        message_surface = message_font.render(state.message, True, (30, 30, 100))
         message_rect = message_surface.get_rect(center=(WIDTH // 2, board_y_offset // 2 + 35))
         # Add semi-transparent background
         msg_bg = pygame.Rect(message_rect)
@@ -1084,79 +709,298 @@ while running:
         pygame.draw.rect(screen, (255, 255, 255, 150), msg_bg, border_radius=10)
         pygame.draw.rect(screen, (100, 100, 150), msg_bg, 2, border_radius=10)
         screen.blit(message_surface, message_rect)
+    profiler.lap("draw.banner")
+
+    if show_search_stats:
+        draw_search_stats()
+    if show_profile:
+        draw_profile(now)
+    profiler.lap("draw.overlays")
+
+# Frame-time profiler: the sections of every frame are timed, and P toggles
+# a HUD with the FPS, frame-time percentiles and the cost per section. Run
+# with --profile-dump PATH (.csv or .json) to write the last PROFILE_WINDOW
+# frames to PATH every PROFILE_DUMP_SECONDS and on exit.
+PROFILE_WINDOW = 300
+PROFILE_DUMP_SECONDS = 5.0
+profiler = FrameProfiler(PROFILE_WINDOW)
+show_profile = False
+profile_dump = sys.argv[sys.argv.index("--profile-dump") + 1] if "--profile-dump" in sys.argv[:-1] else None
+PROFILE_RECT = pygame.Rect(STATS_RECT.right + 10, BOARD_RECT.top + 10, 330, 190)
+profile_lines = (None, [])  # (quarter second, HUD text), so redraws in between match
+
+def profile_tick(now):
+    return int(now * 4)
+
+def draw_profile(now):
+    global profile_lines
+    if profile_lines[0] != profile_tick(now):
+        profile_lines = (profile_tick(now), profiler.lines())
+    panel = pygame.Surface(PROFILE_RECT.size, pygame.SRCALPHA)
+    panel.fill((255, 255, 255, 220))
+    screen.blit(panel, PROFILE_RECT.topleft)
+    pygame.draw.rect(screen, (100, 100, 150), PROFILE_RECT, 2)
+    y = PROFILE_RECT.y + 8
+    for line in profile_lines[1]:
+        screen.blit(small_font.render(line, True, (30, 30, 100)), (PROFILE_RECT.x + 8, y))
+        y += small_font.get_height() + 2
+
+# Tracing: run with --trace PATH to record the turns, the AI searches and the
+# sections of every frame as spans, written to PATH as Chrome Trace Event JSON
+# (chrome://tracing, Perfetto) on exit and when T is pressed. Only the most
+# recent spans are kept, so it can stay on for a long game.
+trace_path = sys.argv[sys.argv.index("--trace") + 1] if "--trace" in sys.argv[:-1] else None
+if trace_path:
+    tracer.start()
+    profiler.tracer = tracer
+turn = (state.current_player, time.perf_counter())  # Whose turn it is, and since when
+
+def trace_turn():
+    """Record the turn that is running as a span, up to now"""
+    tracer.complete(f"{turn[0]}'s turn", "turn", turn[1], time.perf_counter(), track="Turns")
+
+# Dirty-rectangle rendering: each frame describes what every region of the
+# screen shows, and only the regions whose description changed are drawn to
+# the display. Nothing is drawn while nothing changes, and the loop drops to
+# IDLE_FPS while nothing moves by itself. Run with --full-redraw to draw
+# and flip the whole screen every frame instead.
+full_redraw = "--full-redraw" in sys.argv
+ACTIVE_FPS = 60
+IDLE_FPS = 10
+
+TOP_RECT = pygame.Rect(0, 0, WIDTH, board_y_offset + 30)  # Title, turn and message banner
+# The cards can reach below HEIGHT, so the lower regions go to the bottom of the display
+LOWER_Y = board_y_offset + BOARD_HEIGHT
+LOWER_HEIGHT = max(HEIGHT, screen.get_height()) - LOWER_Y
+HAND_RECT = pygame.Rect(0, LOWER_Y, hand_width, LOWER_HEIGHT)
+CARD_PANEL_RECT = pygame.Rect(hand_width, LOWER_Y, card_area_width - 10, LOWER_HEIGHT)
+DECK_PANEL_RECT = pygame.Rect(hand_width + card_area_width - 10, LOWER_Y,
+                              WIDTH - (hand_width + card_area_width - 10), LOWER_HEIGHT)
+
+def is_animating(now):
+    return move_animation and now - animation_start_time < animation_duration
+
+def describe_scene(now):
+    """What each screen region shows, as {region: (rect, signature)}"""
+    player = state.current_player
+    scene = {}
+    thinking = int(now * 3) % 4 if ai_search.pending else None
+    message = state.message if state.message_timer > 0 else None
+    scene["top"] = (TOP_RECT, (player, thinking, message))
+    choosing_color = state.waiting_for_color_choice and player == "Player1"
+    view = (camera.zoom_index, camera.x, camera.y)
+    scene["board"] = (BOARD_RECT, (board_version, view, choosing_color))
+    for name, pos, offset in player_cells():
+        scene[("token", name)] = (token_rect(pos, offset).clip(BOARD_RECT), name == player)
+
+    hand = state.player_hands[player]
+    if player == "Player1":
+        cards = tuple(zip(hand, map(pulse_width, game.playable_mask(hand))))
+    else:
+        cards = len(hand)
+    frame = now if is_animating(now) else None  # The card animation changes every frame
+    scene["hand"] = (HAND_RECT, (player, cards, selected_card, frame))
+    scene["card"] = (CARD_PANEL_RECT, (state.current_card, frame))
+    deck_clickable = player == "Player1" and len(state.deck) > 0
+    scene["deck"] = (DECK_PANEL_RECT, (len(state.deck), pulse_width(deck_clickable)))
+    if show_search_stats:
+        scene["stats"] = (STATS_RECT, search_stats)
+    if show_profile:
+        scene["profile"] = (PROFILE_RECT, profile_tick(now))  # Updated four times a second
+    return scene
+
+def dirty_rects(old_scene, scene):
+    """Old and new rects of every region that changed"""
+    dirty = []
+    for region in old_scene.keys() | scene.keys():
+        old = old_scene.get(region)
+        new = scene.get(region)
+        if old != new:
+            if old is not None:
+                dirty.append(old[0])
+            if new is not None:
+                dirty.append(new[0])
+    return dirty
+
+def scene_is_active(now):
+    """Whether anything on the screen changes by itself"""
+    if is_animating(now) or state.message_timer > 0 or ai_thinking or ai_search.pending:
+        return True
+    # The pulsating highlights of the human's playable cards and the deck
+    if state.current_player == "Player1":
+        return bool(state.deck) or any(game.playable_mask(state.player_hands["Player1"]))
+    return False
+
+# Game loop
+running = True
+clock = pygame.time.Clock()
+selected_card = -1
+card_rects = []
+deck_rect = pygame.Rect(0, 0, 0, 0)
+color_buttons = []
+last_scene = {}
+last_frame_time = time.time()
+frame_ticks = 0  # pygame ticks of the frame, for the pulsating highlights
+
+last_profile_dump = time.time()
+
+while running:
+    profiler.start_frame()
+    now = time.time()
+    frame_ticks = pygame.time.get_ticks()
+
+    # Messages are shown for a number of seconds, whatever the frame rate
+    if state.message_timer > 0:
+        state.message_timer = max(0, state.message_timer - (now - last_frame_time))
+    last_frame_time = now
+
+    # Keep the current player in view
+    camera.look_at(state.players[state.current_player]["pos"])
+
+    scene = describe_scene(now)
+    dirty = None if full_redraw or not last_scene else dirty_rects(last_scene, scene)
+    profiler.lap("scene")
+    if dirty is None:
+        draw_frame(now)
+        pygame.display.flip()
+    elif dirty:
+        draw_frame(now)
+        pygame.display.update(dirty)
+    last_scene = scene
+    profiler.lap("display")
+
+    current_hand = state.player_hands[state.current_player]
 
     # Process events
     for event in pygame.event.get():
         if event.type == pygame.QUIT:
             running = False
+
+        elif event.type == pygame.VIDEORESIZE:
+            invalidate_board_tiles()
         
         elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
             # Check if waiting for color selection
-            if waiting_for_color_choice and current_player == "Player1":
+            if state.waiting_for_color_choice and state.current_player == "Player1":
                 for button_rect, color in color_buttons:
                     if button_rect.collidepoint(event.pos):
-                        set_card_color(color)
+                        game.set_card_color(color)
                         break
             else:
                 # Only process clicks if it's Player1's turn and AI is not thinking
-                if current_player == "Player1" and not ai_thinking:
+                if state.current_player == "Player1" and not ai_thinking:
                     # Check if player clicked on a card in their hand
                     for i, card_rect in enumerate(card_rects):
                         if card_rect.collidepoint(event.pos):
                             # Try to play the card
-                            if can_play_card(current_hand[i]):
+                            if game.can_play_card(current_hand[i]):
                                 play_card(i)
                             else:
                                 selected_card = i
-                                message = "Can't play that card!"
-                                message_timer = 60
+                                game.post_message("Can't play that card!", 1.0)
                             break
                     
                     # Check if player clicked on the draw deck
-                    if deck_rect.collidepoint(event.pos) and len(deck) > 0:
-                        draw_from_deck()
+                    if deck_rect.collidepoint(event.pos) and len(state.deck) > 0:
+                        game.draw_from_deck()
         
         elif event.type == pygame.KEYDOWN:
             # Manual controls for testing
             if event.key == pygame.K_SPACE:
-                if current_player == "Player1" and selected_card >= 0 and selected_card < len(current_hand):
+                if state.current_player == "Player1" and selected_card >= 0 and selected_card < len(current_hand):
                     play_card(selected_card)
                     selected_card = -1
             
             elif event.key == pygame.K_LEFT:
-                if current_player == "Player1" and len(current_hand) > 0:
+                if state.current_player == "Player1" and len(current_hand) > 0:
                     selected_card = max(selected_card - 1, 0) if selected_card > 0 else len(current_hand) - 1
             
             elif event.key == pygame.K_RIGHT:
-                if current_player == "Player1" and len(current_hand) > 0:
+                if state.current_player == "Player1" and len(current_hand) > 0:
                     selected_card = (selected_card + 1) % len(current_hand)
             
             # Test draws
             elif event.key == pygame.K_d:
-                if current_player == "Player1":
-                    draw_from_deck()
+                if state.current_player == "Player1":
+                    game.draw_from_deck()
             
             # Switch player for testing
             elif event.key == pygame.K_TAB:
-                advance_turn()
-                message = f"{current_player}'s turn"
-                message_timer = 60
+                ai_search.cancel()
+                ai_thinking = False
+                game.advance_turn()
+                game.post_message(f"{state.current_player}'s turn", 1.0)
+            
+            # Zoom the board in and out
+            elif event.key in (pygame.K_EQUALS, pygame.K_PLUS, pygame.K_KP_PLUS):
+                camera.zoom_by(1)
+            elif event.key in (pygame.K_MINUS, pygame.K_KP_MINUS):
+                camera.zoom_by(-1)
             
+            # Search stats overlay and frame-time HUD
+            elif event.key == pygame.K_s:
+                show_search_stats = not show_search_stats
+            elif event.key == pygame.K_p:
+                show_profile = not show_profile
+
+            # Write the trace so far
+            elif event.key == pygame.K_t and trace_path:
+                tracer.write(trace_path)
+                game.post_message(f"Trace written to {trace_path}", 1.5)
+
             # Escape to quit
             elif event.key == pygame.K_ESCAPE:
                 running = False
 
-    # If it's AI's turn and not waiting for color choice, let AI make a move
-    if current_player == "AI" and not ai_thinking:
+    profiler.lap("events")
+
+    # If it's AI's turn, start a search unless the move is a color choice
+    # or about a drawn card, which are decided at once
+    if state.current_player == "AI" and not ai_thinking:
         ai_thinking = True
         ai_move_start_time = time.time()
-
-    # Delay AI move slightly to simulate thinking
-    if ai_thinking and time.time() - ai_move_start_time >= ai_bot.thinking_delay:
-        ai_make_move()
-        ai_thinking = False
-
-    pygame.display.flip()
-    clock.tick(60)
-
+        ponderer.stop()
+        if not (state.waiting_for_color_choice or state.has_drawn_card):
+            ai_search.start(ponderer.lookup(state))
+
+    # Ponder while the human thinks, again whenever their position changes
+    if (ponder_enabled and state.current_player == "Player1" and not state.winner
+            and ponderer.position != position_key(state)):
+        ponderer.start()
+
+    # A searched move is played once the search is done and the card
+    # animation has finished; other decisions wait to simulate thinking
+    if ai_thinking:
+        waited = time.time() - ai_move_start_time
+        if ai_search.pending:
+            if waited >= animation_duration:
+                best_move = ai_search.poll()
+                if best_move is not None:
+                    ai_play_move(best_move)
+                    ai_thinking = False
+        elif waited >= ai_bot.thinking_delay:
+            ai_make_move()
+            ai_thinking = False
+
+    profiler.lap("ai")
+    turn_player = None if state.winner else state.current_player  # Turns stop at the end of the game
+    if turn_player != turn[0]:
+        if turn[0] is not None:
+            trace_turn()
+        turn = (turn_player, time.perf_counter())
+    profiler.end_frame()
+    if profile_dump and time.time() - last_profile_dump >= PROFILE_DUMP_SECONDS:
+        profiler.dump(profile_dump)
+        last_profile_dump = time.time()
+
+    clock.tick(ACTIVE_FPS if full_redraw or scene_is_active(time.time()) else IDLE_FPS)
+
+if profile_dump:
+    profiler.dump(profile_dump)
+ai_search.cancel()
+ponderer.stop()
+if trace_path:
+    if turn[0] is not None:
+        trace_turn()
+    tracer.write(trace_path)
 pygame.quit()
\ No newline at end of file
@@ -0,0 +1,79 @@
+# ponder.py
+# Pondering: while the human thinks, the AI searches the positions that
+# each of the human's possible moves leads to. When the human's move
+# arrives the answer is usually known already, and the bot's tables (such
+# as AIBot's transposition table) are warm for anything that was missed.
+import copy
+import threading
+from engine import Engine
+from ismcts import legal_moves, apply_move, DRAW
+
+def position_key(state):
+    """Everything about a position that the AI's move depends on"""
+    return (
+        state.current_player_idx, state.game_direction, state.current_card,
+        state.black_card_played, state.waiting_for_color_choice, state.has_drawn_card,
+        tuple((info["pos"], info["skip_turn"]) for info in state.players.values()),
+        tuple(tuple(sorted(hand)) for hand in state.player_hands.values()),
+        bytes(sorted(state.deck)),
+    )
+
+class Ponderer:
+    def __init__(self, bot):
+        self.bot = bot
+        self.answers = {}  # position key -> card id to play, or DRAW
+        self.searcher = None
+        self.position = None  # Key of the position being pondered
+        self.generation = 0
+
+    def start(self):
+        """Ponder the replies to every move from the game's current position"""
+        self.stop()
+        self.generation += 1
+        self.answers = {}
+        state = self.bot.game.state
+        self.position = position_key(state)
+
+        searcher = copy.copy(self.bot)
+        searcher.cancelled = False
+        self.searcher = searcher
+        threading.Thread(target=self._run, args=(searcher, state.copy(), self.generation),
+                         daemon=True).start()
+
+    def _run(self, searcher, snapshot, generation):
+        player = self.bot.player_name
+        for move in legal_moves(Engine.from_state(snapshot)):
+            world = Engine.from_state(snapshot.copy())
+            apply_move(world, move)
+            state = world.state
+
+            # Only positions where the AI has to search for a move
+            if (state.winner is not None or state.current_player != player
+                    or state.waiting_for_color_choice or state.has_drawn_card):
+                continue
+            searcher.game = world
+            try:
+                answer = searcher.find_best_move()
+            except Exception as e:
+                print(f"AI error: {e}")
+                continue
+            if searcher.cancelled or generation != self.generation:
+                return
+            self.answers[position_key(state)] = DRAW if answer['type'] == 'draw' else answer['card']
+
+    def stop(self):
+        """Stop pondering; the answers found so far are kept"""
+        if self.searcher is not None:
+            self.searcher.cancelled = True
+            self.searcher = None
+        self.position = None
+
+    def lookup(self, state):
+        """The pondered move for `state` in find_best_move() form, or None"""
+        answer = self.answers.get(position_key(state))
+        if answer is None:
+            return None
+        if answer == DRAW:
+            return {'type': 'draw'}
+        hand = state.player_hands[self.bot.player_name]
+        return {'type': 'play', 'card_index': hand.index(answer), 'card': answer}
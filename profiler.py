@@ -0,0 +1,117 @@
+# profiler.py
+# Frame-time profiling for the render loop: the frame is cut into named
+# sections by lap marks, and the section times are kept for a rolling window
+# of recent frames. Gives the FPS, frame-time percentiles and the mean cost
+# of each section, and can dump the window as CSV or JSON for offline
+# analysis. With a tracer attached, every frame and section is also
+# recorded as a trace span (see tracing.py). Nothing in here imports pygame.
+import csv
+import json
+import os
+import time
+from collections import deque
+
+class FrameProfiler:
+    """
+    Times the frames of a loop: call start_frame() and end_frame() around
+    the work of each frame, and lap(name) at the end of each section. A lap
+    charges the time since the previous mark to `name`, so the sections add
+    up to the frame time, and a section lapped several times adds up too.
+    """
+
+    def __init__(self, window=300):
+        self.enabled = True
+        self.frames = deque(maxlen=window)  # (start time, work seconds, {section: seconds})
+        self.frame_count = 0
+        self._sections = {}
+        self._frame_start = None
+        self._mark = 0.0
+        self.tracer = None  # tracing.Tracer that also gets the sections as spans
+
+    def start_frame(self):
+        if self.enabled:
+            self._sections = {}
+            self._frame_start = self._mark = time.perf_counter()
+
+    def lap(self, name):
+        """End the section `name`, which started at the previous mark"""
+        if self._frame_start is None:
+            return
+        now = time.perf_counter()
+        sections = self._sections
+        sections[name] = sections.get(name, 0.0) + now - self._mark
+        if self.tracer is not None and self.tracer.enabled:
+            self.tracer.complete(name, "frame", self._mark, now)
+        self._mark = now
+
+    def end_frame(self):
+        """Close the frame; its time runs from start_frame() until now"""
+        if self._frame_start is None:
+            return
+        now = time.perf_counter()
+        self.frames.append((self._frame_start, now - self._frame_start, self._sections))
+        if self.tracer is not None and self.tracer.enabled:
+            self.tracer.complete("frame", "frame", self._frame_start, now, {'frame': self.frame_count})
+        self.frame_count += 1
+        self._frame_start = None
+
+    def fps(self):
+        """Frames per second over the window, from frame start to frame start"""
+        if len(self.frames) < 2:
+            return 0.0
+        elapsed = self.frames[-1][0] - self.frames[0][0]
+        return (len(self.frames) - 1) / elapsed if elapsed > 0 else 0.0
+
+    def percentiles(self, points=(50, 95, 99)):
+        """{point: frame time in seconds} over the window (nearest rank)"""
+        times = sorted(frame[1] for frame in self.frames)
+        if not times:
+            return {point: 0.0 for point in points}
+        return {point: times[min(len(times) - 1, max(0, -(-point * len(times) // 100) - 1))]
+                for point in points}
+
+    def section_means(self):
+        """{section: mean seconds per frame} over the window, costliest first"""
+        totals = {}
+        for _, _, sections in self.frames:
+            for name, seconds in sections.items():
+                totals[name] = totals.get(name, 0.0) + seconds
+        count = len(self.frames) or 1
+        return dict(sorted(((name, total / count) for name, total in totals.items()),
+                           key=lambda item: item[1], reverse=True))
+
+    def lines(self, sections=8):
+        """Summary as short lines of text, for the HUD"""
+        p = self.percentiles()
+        lines = [f"{self.fps():.0f} FPS   frame p50 {p[50] * 1000:.2f}  p95 {p[95] * 1000:.2f}  "
+                 f"p99 {p[99] * 1000:.2f} ms"]
+        for name, seconds in list(self.section_means().items())[:sections]:
+            lines.append(f"  {name:<16}{seconds * 1000:8.3f} ms")
+        return lines
+
+    def dump(self, path):
+        """
+        Write the window to `path`: JSON if it ends in .json, otherwise CSV
+        with one row per frame and one column per section. The file is
+        replaced at once, so a reader never sees half of it.
+        """
+        first = self.frame_count - len(self.frames)
+        names = sorted({name for _, _, sections in self.frames for name in sections})
+        temp = path + ".tmp"
+        with open(temp, "w", newline="") as f:
+            if path.endswith(".json"):
+                json.dump({
+                    'fps': self.fps(),
+                    'percentiles_ms': {str(point): seconds * 1000 for point, seconds in self.percentiles().items()},
+                    'section_means_ms': {name: seconds * 1000 for name, seconds in self.section_means().items()},
+                    'frames': [{'frame': first + i, 'start': start, 'frame_ms': seconds * 1000,
+                                'sections_ms': {name: s * 1000 for name, s in sections.items()}}
+                               for i, (start, seconds, sections) in enumerate(self.frames)],
+                }, f, indent=1)
+            else:
+                writer = csv.writer(f)
+                writer.writerow(["frame", "start", "frame_ms"] + [f"{name}_ms" for name in names])
+                for i, (start, seconds, sections) in enumerate(self.frames):
+                    writer.writerow([first + i, f"{start:.6f}", f"{seconds * 1000:.4f}"]
+                                    + [f"{sections.get(name, 0.0) * 1000:.4f}" for name in names])
+        os.replace(temp, path)
@@ -0,0 +1,45 @@
+# rules.py
+# Card playability compiled into lookup tables once at import, shared by the
+# engine, the UI and both bots. PLAYABLE[black_card_played][top_card] is a
+# 256-byte table holding 1 at every card id that can be played on top_card,
+# so one card is a single index and a whole hand is one bytes.translate().
+# PLAYABLE_BITS holds the same sets as bitmasks over card ids, for hands that
+# are kept as bitmasks (see SearchState).
+from cards import (BLACK, NUM_CARD_IDS, CARD_COLOR, CARD_LABEL,
+                   COLOR_BITS, LABEL_BITS, ALL_CARD_BITS)
+
+def _rule(card, top_card):
+    # Black cards can be played on anything, and anything on a black card
+    if CARD_COLOR[card] == BLACK or CARD_COLOR[top_card] == BLACK:
+        return True
+    # Same color or same label (number or action)
+    return CARD_COLOR[card] == CARD_COLOR[top_card] or CARD_LABEL[card] == CARD_LABEL[top_card]
+
+def _table(top_card):
+    return bytes(card < NUM_CARD_IDS and _rule(card, top_card) for card in range(256))
+
+# After a black card any card can be played, whatever is on top
+_ANY_CARD = bytes(card < NUM_CARD_IDS for card in range(256))
+
+PLAYABLE = (
+    tuple(_table(top_card) for top_card in range(NUM_CARD_IDS)),
+    (_ANY_CARD,) * NUM_CARD_IDS,
+)
+
+def _bits(top_card):
+    if CARD_COLOR[top_card] == BLACK:
+        return ALL_CARD_BITS
+    return COLOR_BITS[BLACK] | COLOR_BITS[CARD_COLOR[top_card]] | LABEL_BITS[CARD_LABEL[top_card]]
+
+PLAYABLE_BITS = (
+    tuple(_bits(top_card) for top_card in range(NUM_CARD_IDS)),
+    (ALL_CARD_BITS,) * NUM_CARD_IDS,
+)
+
+def can_play(card, top_card, black_card_played=False):
+    """1 if `card` can be played on `top_card`, else 0"""
+    return PLAYABLE[black_card_played][top_card][card]
+
+def playable_mask(hand, top_card, black_card_played=False):
+    """bytes with a 1 for each card of `hand` that can be played and a 0 for the rest"""
+    return bytes(hand).translate(PLAYABLE[black_card_played][top_card])
@@ -0,0 +1,338 @@
+# search.py
+# Compact two-player game state used by the AI search. Moves are applied in
+# place and undone from an undo record, so a search never copies the state.
+# The state also keeps an incremental Zobrist hash for the transposition table.
+# Hands are card-count vectors plus a bitmask of the card ids held, so move
+# generation is an AND with the top card's playable mask and adding or
+# removing a card is O(1).
+import random
+from cards import (cards_of_bits, recolor, BLACK, NUM_CARD_IDS, CARD_COLOR, CARD_RANK, CARD_EFFECT,
+                   CARD_DRAW_COUNT, EFFECT_MOVE, EFFECT_SKIP, EFFECT_REVERSE, EFFECT_DRAW)
+from rules import can_play, PLAYABLE_BITS
+
+# A move is either the id of the card to play or DRAW
+DRAW = -1
+# Undo records of apply_draw() hold DRAWN - card in place of the move
+DRAWN = -2
+
+# Zobrist keys. A hand is hashed as a multiset: the k-th copy of a card in a
+# hand has its own key, so the hash does not depend on the order of the hand.
+MAX_COPIES = 8
+MAX_DECK = 256
+_zobrist_rng = random.Random(20240501)
+
+def _random_keys(count):
+    return [_zobrist_rng.getrandbits(64) for _ in range(count)]
+
+Z_HAND = [[_random_keys(MAX_COPIES + 1) for _ in range(NUM_CARD_IDS)] for _ in range(2)]
+Z_TOP = _random_keys(NUM_CARD_IDS)
+Z_SKIP = _random_keys(2)
+Z_TO_MOVE = _random_keys(1)[0]
+Z_DIRECTION = _random_keys(1)[0]
+Z_DECK = _random_keys(MAX_DECK)
+Z_UNSEEN = [_random_keys(MAX_COPIES + 1) for _ in range(NUM_CARD_IDS)]
+_z_pos = [[], []]
+
+def zobrist_pos_keys(goal):
+    """Per-side position keys for squares 0..goal"""
+    for keys in _z_pos:
+        if len(keys) <= goal:
+            keys.extend(_random_keys(goal + 1 - len(keys)))
+    return _z_pos
+
+class SearchState:
+    """
+    Two-player search state, indexed by side (0 = the searching player,
+    1 = the opponent). apply() changes the state in place and returns an undo
+    record that undo() uses to restore it exactly.
+
+    `unseen` is the multiset of cards the searching player cannot see (the
+    draw pile, in any order). apply_draw() draws a given card from it, for
+    the chance nodes of expectiminimax.
+    """
+
+    def __init__(self, players, hands, current_card, positions, skips, deck_size, goal,
+                 to_move=0, direction=1, unseen=()):
+        self.players = list(players)
+        self.current_card = current_card
+        self.pos = list(positions)
+        self.skip = list(skips)
+        self.deck_size = deck_size
+        self.goal = goal
+        self.to_move = to_move
+        self.direction = direction
+        self.z_pos = zobrist_pos_keys(goal)
+        self.counts = [bytearray(NUM_CARD_IDS), bytearray(NUM_CARD_IDS)]
+        self.bits = [0, 0]  # Bit `card` is set while the side holds one or more
+        self.sizes = [len(hand) for hand in hands]
+        for side, hand in enumerate(hands):
+            for card in hand:
+                self.counts[side][card] += 1
+                self.bits[side] |= 1 << card
+        self.unseen = bytearray(NUM_CARD_IDS)
+        for card in unseen:
+            self.unseen[card] += 1
+        self.unseen_total = len(unseen)
+        self.hash = self.compute_hash()
+
+    def compute_hash(self):
+        """Full Zobrist hash of the state (apply/undo keep it up to date)"""
+        h = Z_TOP[self.current_card] ^ Z_DECK[self.deck_size]
+        for side in (0, 1):
+            keys = Z_HAND[side]
+            for card, count in enumerate(self.counts[side]):
+                for k in range(1, count + 1):
+                    h ^= keys[card][k]
+            h ^= self.z_pos[side][self.pos[side]]
+            if self.skip[side]:
+                h ^= Z_SKIP[side]
+        if self.to_move:
+            h ^= Z_TO_MOVE
+        if self.direction < 0:
+            h ^= Z_DIRECTION
+        for card, count in enumerate(self.unseen):
+            for k in range(1, count + 1):
+                h ^= Z_UNSEEN[card][k]
+        return h
+
+    @classmethod
+    def from_game(cls, state, player, opponent):
+        """Snapshot an engine GameState from `player`'s point of view"""
+        current_card = state.current_card
+        if state.black_card_played:
+            # After a black card any card can be played, as on a black top card
+            current_card = recolor(current_card, "Black")
+        return cls(
+            (player, opponent),
+            (state.player_hands[player], state.player_hands[opponent]),
+            current_card,
+            (state.players[player]["pos"], state.players[opponent]["pos"]),
+            (state.players[player]["skip_turn"], state.players[opponent]["skip_turn"]),
+            len(state.deck),
+            state.goal,
+            to_move=0 if state.current_player == player else 1,
+            direction=state.game_direction,
+            # Both hands are visible to the AI, so every card it cannot see
+            # is in the draw pile (the composition is known, the order is not)
+            unseen=state.deck,
+        )
+
+    def moves(self):
+        """
+        Legal moves for the side to move: playable card ids, then DRAW.
+        Copies of a card lead to the same position, so each card id is one
+        move however many copies are held.
+        """
+        moves = list(cards_of_bits(self.bits[self.to_move] & PLAYABLE_BITS[0][self.current_card]))
+        if self.deck_size > 0:
+            moves.append(DRAW)
+        return moves
+
+    def hand(self, side):
+        """Cards held by `side`, as a list of ids in id order"""
+        counts = self.counts[side]
+        return [card for card in cards_of_bits(self.bits[side]) for _ in range(counts[card])]
+
+    def draw_outcomes(self):
+        """(card, probability) for each card type that a draw can give"""
+        total = self.unseen_total
+        return [(card, count / total) for card, count in enumerate(self.unseen) if count]
+
+    def is_terminal(self):
+        pos = self.pos
+        sizes = self.sizes
+        return pos[0] >= self.goal or pos[1] >= self.goal or not sizes[0] or not sizes[1]
+
+    def apply(self, move):
+        """Play `move` for the side to move and return its undo record"""
+        side = self.to_move
+        other = 1 - side
+        pos = self.pos
+        skip = self.skip
+        undo = (move, self.current_card, pos[0], pos[1], skip[0], skip[1],
+                self.deck_size, side, self.direction, self.hash)
+
+        if move == DRAW:
+            if self.deck_size > 0:
+                self.deck_size -= 1
+            black = False
+        else:
+            card = move
+            counts = self.counts[side]
+            h = self.hash ^ Z_HAND[side][card][counts[card]] ^ Z_TOP[self.current_card] ^ Z_TOP[card]
+            counts[card] -= 1
+            if not counts[card]:
+                self.bits[side] ^= 1 << card
+            self.sizes[side] -= 1
+            self.hash = h
+            self.current_card = card
+            black = CARD_COLOR[card] == BLACK
+
+            # Apply card effects
+            effect = CARD_EFFECT[card]
+            if effect == EFFECT_MOVE:
+                pos[side] = min(pos[side] + CARD_RANK[card], self.goal)
+            elif effect == EFFECT_SKIP:
+                skip[other] = True
+            elif effect == EFFECT_REVERSE:
+                # With two players Reverse works as Skip
+                self.direction = -self.direction
+                skip[other] = True
+            elif effect == EFFECT_DRAW:
+                draw_count = CARD_DRAW_COUNT[card]
+                pos[other] = max(1, pos[other] - draw_count)
+                if not black:
+                    self.deck_size -= min(draw_count, self.deck_size)
+
+        # Switch turns unless it's a black card that allows another turn
+        if not black:
+            self._pass_turn(other)
+        self._rehash(undo)
+        return undo
+
+    def apply_draw(self, card):
+        """
+        Draw `card` from the unseen cards for the side to move and return the
+        undo record. A playable drawn card keeps the turn so that it can be
+        played next; otherwise the turn passes as for DRAW.
+        """
+        side = self.to_move
+        pos = self.pos
+        skip = self.skip
+        undo = (DRAWN - card, self.current_card, pos[0], pos[1], skip[0], skip[1],
+                self.deck_size, side, self.direction, self.hash)
+
+        counts = self.counts[side]
+        counts[card] += 1
+        self.bits[side] |= 1 << card
+        self.sizes[side] += 1
+        h = self.hash ^ Z_HAND[side][card][counts[card]] ^ Z_UNSEEN[card][self.unseen[card]]
+        self.unseen[card] -= 1
+        self.unseen_total -= 1
+        self.hash = h
+        if self.deck_size > 0:
+            self.deck_size -= 1
+
+        if not can_play(card, self.current_card):
+            self._pass_turn(1 - side)
+        self._rehash(undo)
+        return undo
+
+    def _pass_turn(self, other):
+        # A skipped player loses their turn, so the mover goes again
+        if self.skip[other]:
+            self.skip[other] = False
+        else:
+            self.to_move = other
+
+    def _rehash(self, undo):
+        """Hash in the scalar fields that may have changed since `undo` was taken"""
+        side = undo[7]
+        pos = self.pos
+        skip = self.skip
+        h = self.hash
+        z_pos = self.z_pos
+        if pos[0] != undo[2]:
+            h ^= z_pos[0][undo[2]] ^ z_pos[0][pos[0]]
+        if pos[1] != undo[3]:
+            h ^= z_pos[1][undo[3]] ^ z_pos[1][pos[1]]
+        if skip[0] != undo[4]:
+            h ^= Z_SKIP[0]
+        if skip[1] != undo[5]:
+            h ^= Z_SKIP[1]
+        if self.deck_size != undo[6]:
+            h ^= Z_DECK[undo[6]] ^ Z_DECK[self.deck_size]
+        if self.to_move != side:
+            h ^= Z_TO_MOVE
+        if self.direction != undo[8]:
+            h ^= Z_DIRECTION
+        self.hash = h
+
+    def undo(self, undo):
+        """Restore the state from an undo record returned by apply() or apply_draw()"""
+        played = self.current_card
+        (move, self.current_card, pos0, pos1, skip0, skip1,
+         self.deck_size, self.to_move, self.direction, self.hash) = undo
+        self.pos[0] = pos0
+        self.pos[1] = pos1
+        self.skip[0] = skip0
+        self.skip[1] = skip1
+        side = self.to_move
+        if move <= DRAWN:
+            card = DRAWN - move
+            counts = self.counts[side]
+            counts[card] -= 1
+            if not counts[card]:
+                self.bits[side] ^= 1 << card
+            self.sizes[side] -= 1
+            self.unseen[card] += 1
+            self.unseen_total += 1
+        elif move != DRAW:
+            self.counts[side][played] += 1
+            self.bits[side] |= 1 << played
+            self.sizes[side] += 1
+
+
+# Transposition table bound flags
+EXACT = 0
+LOWER = 1   # The value is a lower bound (the search failed high)
+UPPER = 2   # The value is an upper bound (the search failed low)
+
+class TranspositionTable:
+    """
+    Fixed-size hash table of search results keyed by Zobrist hash.
+    An entry is replaced by a search to the same or greater depth, or by
+    any result from a newer search (see new_search()).
+    """
+
+    def __init__(self, size_bits=16):
+        self.size = 1 << size_bits
+        self.mask = self.size - 1
+        self.entries = [None] * self.size
+        self.age = 0
+        self.probes = 0
+        self.hits = 0
+        self.cutoffs = 0
+        self.stores = 0
+        self.overwrites = 0
+
+    def new_search(self):
+        """Start a new search; older entries become replaceable"""
+        self.age += 1
+
+    def clear(self):
+        self.entries = [None] * self.size
+
+    def probe(self, key):
+        """Entry (key, depth, flag, value, move, age) for `key`, or None"""
+        self.probes += 1
+        entry = self.entries[key & self.mask]
+        if entry is not None and entry[0] == key:
+            self.hits += 1
+            return entry
+        return None
+
+    def store(self, key, depth, flag, value, move):
+        index = key & self.mask
+        entry = self.entries[index]
+        if entry is not None:
+            if entry[5] == self.age and entry[1] > depth:
+                return
+            if entry[0] != key:
+                self.overwrites += 1
+        self.entries[index] = (key, depth, flag, value, move, self.age)
+        self.stores += 1
+
+    @property
+    def hit_rate(self):
+        return self.hits / self.probes if self.probes else 0.0
+
+    def stats(self):
+        return {
+            'probes': self.probes,
+            'hits': self.hits,
+            'hit_rate': self.hit_rate,
+            'cutoffs': self.cutoffs,
+            'stores': self.stores,
+            'overwrites': self.overwrites,
+        }
@@ -0,0 +1,253 @@
+# tournament.py
+# Headless self-play: plays games between two bots with no display and
+# reports win rates, games/sec, nodes/sec and move latency. Turns are driven
+# the way main.py drives the AI (color choice, playing a drawn card), but a
+# bot moves as soon as its search is done instead of after thinking_delay.
+#
+#   python tournament.py aibot random --games 200 --time 0.05 --seed 1
+#   python tournament.py aibot ismcts --games 4 --trace trace.json
+#   python tournament.py aibot random --games 100 --time 0 --nodes 2000 --min-win-rate 0.4
+#
+# With --min-win-rate it exits with an error when the first bot wins less
+# often than that, so that a drop in playing strength fails the run.
+import argparse
+import math
+import random
+import sys
+import time
+from board import parse_board_size
+from engine import Engine, ROWS, COLS
+from aibot import AIBot, MinimaxAIBot, most_common_color
+from ismcts import ISMCTSBot
+from tracing import tracer
+
+MAX_TURNS = 2000  # A game still running after this many turns is a draw
+
+class RandomBot:
+    """Baseline: plays a random playable card, or draws if there is none"""
+
+    def __init__(self, game, player_name, seed=None):
+        self.game = game
+        self.player_name = player_name
+        self.rng = random.Random(seed)
+        self.nodes = 0
+
+    def find_best_move(self):
+        hand = self.game.state.player_hands[self.player_name]
+        playable = [i for i, ok in enumerate(self.game.playable_mask(hand)) if ok]
+        if not playable:
+            return {'type': 'draw'}
+        index = self.rng.choice(playable)
+        return {'type': 'play', 'card_index': index, 'card': hand[index]}
+
+    def choose_color(self):
+        return most_common_color(self.game.state.player_hands[self.player_name])
+
+
+def make_bot(kind, game, player, opponent, seed, time_budget, node_budget):
+    """A bot of `kind` (see BOTS) playing `player` in `game`"""
+    if kind == "aibot":
+        bot = AIBot(game, player, opponent)
+        bot.time_budget = time_budget
+        bot.node_budget = node_budget
+    elif kind == "minimax":
+        bot = MinimaxAIBot(game, player, opponent)
+    elif kind == "ismcts":
+        bot = ISMCTSBot(game, player, seed)
+        bot.time_budget = time_budget
+        if node_budget is not None:
+            bot.max_iterations = node_budget
+    elif kind == "random":
+        bot = RandomBot(game, player, seed)
+    else:
+        raise ValueError(f"Unknown bot: {kind}")
+    return bot
+
+BOTS = ("aibot", "minimax", "ismcts", "random")
+
+def search_nodes(bot):
+    """Nodes (iterations for ISMCTS) of the bot's last search"""
+    if isinstance(bot, ISMCTSBot):
+        return bot.iterations
+    return getattr(bot, "nodes", 0)
+
+def find_move(bot):
+    """The bot's move in find_best_move() dict form"""
+    move = bot.find_best_move()
+    if isinstance(bot, MinimaxAIBot):
+        # MinimaxAIBot returns a hand index, or None to draw
+        if move is None:
+            return {'type': 'draw'}
+        return {'type': 'play', 'card_index': move}
+    return move
+
+
+class Stats:
+    """Totals for one side of a tournament"""
+
+    def __init__(self):
+        self.wins = 0
+        self.moves = 0
+        self.nodes = 0
+        self.search_time = 0.0
+        self.max_latency = 0.0
+
+    def record_move(self, nodes, seconds):
+        self.moves += 1
+        self.nodes += nodes
+        self.search_time += seconds
+        self.max_latency = max(self.max_latency, seconds)
+
+
+def play_game(kinds, seed, rows=ROWS, cols=COLS, time_budget=0.05, node_budget=None, stats=None):
+    """
+    Play one game between two bot kinds; kinds[0] moves first. Returns the
+    index of the winning kind, or None for a draw. Per-move search numbers
+    are added to `stats` (one Stats per kind) if given.
+    """
+    players = ["Player1", "Player2"]
+    game = Engine(players, rows, cols, seed=seed)
+    state = game.state
+    bots = {
+        player: make_bot(kind, game, player, players[1 - i], seed * 2 + i, time_budget, node_budget)
+        for i, (kind, player) in enumerate(zip(kinds, players))
+    }
+
+    for _ in range(MAX_TURNS):
+        if game.game_over:
+            break
+        player = state.current_player
+        bot = bots[player]
+
+        # Color choice after a black card
+        if state.waiting_for_color_choice:
+            game.set_card_color(bot.choose_color())
+            continue
+
+        # A drawn card is played straight away if it can be, as by the AI in main.py
+        if state.has_drawn_card:
+            hand = state.player_hands[player]
+            if hand and game.can_play_card(hand[-1]):
+                game.play_card(len(hand) - 1)
+            else:
+                game.advance_turn()
+            continue
+
+        start = time.perf_counter()
+        move = find_move(bot)
+        end = time.perf_counter()
+        if stats is not None:
+            stats[players.index(player)].record_move(search_nodes(bot), end - start)
+        tracer.complete(f"{kinds[players.index(player)]} move", "turn", start, end, {'seed': seed, 'player': player})
+
+        if move['type'] == 'play' and game.play_card(move['card_index']):
+            continue
+        # Drawing from an empty deck ends the turn
+        if game.draw_from_deck() is None and not state.has_drawn_card:
+            game.advance_turn()
+
+    if state.winner is None:
+        return None
+    return players.index(state.winner)
+
+
+def wilson_interval(wins, games, z=1.96):
+    """95% Wilson score interval of a win rate"""
+    if games == 0:
+        return 0.0, 1.0
+    p = wins / games
+    denominator = 1 + z * z / games
+    center = (p + z * z / (2 * games)) / denominator
+    spread = z * math.sqrt(p * (1 - p) / games + z * z / (4 * games * games)) / denominator
+    return max(0.0, center - spread), min(1.0, center + spread)
+
+
+def run_tournament(kinds, games, seed=0, rows=ROWS, cols=COLS, time_budget=0.05, node_budget=None):
+    """
+    Play `games` games between two bot kinds, alternating who moves first.
+    Game i is dealt with seed + i. Returns a dict of results.
+    """
+    stats = [Stats(), Stats()]
+    draws = 0
+    start = time.perf_counter()
+    for i in range(games):
+        # The bots swap seats every game
+        order = (0, 1) if i % 2 == 0 else (1, 0)
+        seat_stats = [stats[order[0]], stats[order[1]]]
+        winner = play_game([kinds[order[0]], kinds[order[1]]], seed + i, rows, cols,
+                           time_budget, node_budget, seat_stats)
+        if winner is None:
+            draws += 1
+        else:
+            stats[order[winner]].wins += 1
+    elapsed = time.perf_counter() - start
+
+    results = {
+        'games': games,
+        'draws': draws,
+        'seconds': elapsed,
+        'games_per_sec': games / elapsed if elapsed else 0.0,
+        'bots': [],
+    }
+    for kind, side in zip(kinds, stats):
+        low, high = wilson_interval(side.wins, games)
+        results['bots'].append({
+            'bot': kind,
+            'wins': side.wins,
+            'win_rate': side.wins / games if games else 0.0,
+            'win_rate_ci': (low, high),
+            'moves': side.moves,
+            'nodes': side.nodes,
+            'nodes_per_sec': side.nodes / side.search_time if side.search_time else 0.0,
+            'avg_latency_ms': 1000 * side.search_time / side.moves if side.moves else 0.0,
+            'max_latency_ms': 1000 * side.max_latency,
+        })
+    return results
+
+
+def print_results(results):
+    print(f"{results['games']} games, {results['draws']} draws, {results['seconds']:.1f}s "
+          f"({results['games_per_sec']:.2f} games/sec)")
+    print(f"{'bot':<10}{'wins':>6}{'win rate':>10}{'95% CI':>16}{'nodes/sec':>12}"
+          f"{'avg ms':>9}{'max ms':>9}")
+    for bot in results['bots']:
+        low, high = bot['win_rate_ci']
+        print(f"{bot['bot']:<10}{bot['wins']:>6}{bot['win_rate']:>10.1%}"
+              f"{f'{low:.1%} - {high:.1%}':>16}{bot['nodes_per_sec']:>12.0f}"
+              f"{bot['avg_latency_ms']:>9.1f}{bot['max_latency_ms']:>9.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Play bots against each other without a display")
+    parser.add_argument("bot1", choices=BOTS)
+    parser.add_argument("bot2", choices=BOTS)
+    parser.add_argument("--games", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first game's deal")
+    parser.add_argument("--time", type=float, default=0.05,
+                        help="seconds per move for aibot and ismcts, 0 for no limit")
+    parser.add_argument("--nodes", type=int, default=None,
+                        help="nodes (ismcts: iterations) per move for aibot and ismcts")
+    parser.add_argument("--board", default=f"{ROWS}x{COLS}", help="board size as ROWSxCOLS")
+    parser.add_argument("--trace", metavar="PATH",
+                        help="write the moves and searches to PATH as Chrome Trace Event JSON")
+    parser.add_argument("--min-win-rate", type=float, default=None, metavar="RATE",
+                        help="fail if bot1 wins fewer than this fraction of the games")
+    args = parser.parse_args()
+    try:
+        rows, cols = parse_board_size(args.board)
+    except ValueError as e:
+        parser.error(f"--board: {e}")
+    if args.trace:
+        tracer.start()
+
+    results = run_tournament((args.bot1, args.bot2), args.games, args.seed, rows, cols,
+                             args.time, args.nodes)
+    print_results(results)
+    if args.trace:
+        tracer.write(args.trace)
+    win_rate = results['bots'][0]['win_rate']
+    if args.min_win_rate is not None and win_rate < args.min_win_rate:
+        sys.exit(f"{args.bot1} won {win_rate:.1%} of the games, less than --min-win-rate {args.min_win_rate:.1%}")
+
+if __name__ == "__main__":
+    main()
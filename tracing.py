@@ -0,0 +1,86 @@
+# tracing.py
+# Opt-in tracing of timestamped spans (game turns, AI searches, render
+# sections), written as Chrome Trace Event JSON for chrome://tracing,
+# Perfetto or speedscope. Spans go into a bounded ring buffer, so tracing
+# can stay on for a long session and keeps only the most recent events.
+# Callers time their own spans and record them with complete(), which does
+# nothing while tracing is off. The module-level `tracer` is shared by the
+# bots, the profiler and the UI.
+import json
+import os
+import threading
+import time
+from collections import deque
+
+DEFAULT_CAPACITY = 200000  # Events kept; older ones are dropped first
+MAX_THREAD_NAMES = 256  # Names of threads with no events left are dropped beyond this many
+
+class Tracer:
+    def __init__(self, capacity=DEFAULT_CAPACITY):
+        self.enabled = False
+        # (name, category, start, end, thread id, args); deque appends are thread-safe
+        self.events = deque(maxlen=capacity)
+        self.thread_names = {}  # tid: name of the threads seen
+        self._prune_at = MAX_THREAD_NAMES
+        self.tracks = {}  # track name: tid
+        self.origin = time.perf_counter()
+
+    def start(self, capacity=None):
+        """Turn tracing on, optionally with a new buffer size"""
+        if capacity is not None:
+            self.events = deque(self.events, maxlen=capacity)
+        self.enabled = True
+
+    def stop(self):
+        self.enabled = False
+
+    def complete(self, name, category, start, end, args=None, track=None):
+        """
+        Record a span timed by the caller (perf_counter() start and end). The
+        span goes on the calling thread's row, or on a row of its own named
+        `track` for spans that do not nest with that thread's (such as turns).
+        """
+        if not self.enabled:
+            return
+        if track is None:
+            thread = threading.get_ident()
+            if thread not in self.thread_names:
+                # Searches run on a new thread per move, so drop the old ones
+                if len(self.thread_names) >= self._prune_at:
+                    self.thread_names = self._live_thread_names()
+                    self._prune_at = max(MAX_THREAD_NAMES, 2 * len(self.thread_names))
+                self.thread_names[thread] = threading.current_thread().name
+        else:
+            thread = self.tracks.get(track)
+            if thread is None:
+                thread = self.tracks[track] = len(self.tracks) + 1
+        self.events.append((name, category, start, end, thread, args))
+
+    def _live_thread_names(self):
+        """thread_names of the threads that still have events in the buffer"""
+        live = {event[4] for event in list(self.events)}
+        return {thread: name for thread, name in self.thread_names.items() if thread in live}
+
+    def trace_events(self):
+        """The buffer as a list of Chrome Trace Event dicts, times in microseconds"""
+        pid = os.getpid()
+        origin = self.origin
+        names = self._live_thread_names()
+        names.update((thread, track) for track, thread in self.tracks.items())
+        events = [{"name": "thread_name", "ph": "M", "pid": pid, "tid": thread, "args": {"name": name}}
+                  for thread, name in names.items()]
+        for name, category, start, end, thread, args in list(self.events):
+            event = {"name": name, "cat": category, "ph": "X", "pid": pid, "tid": thread,
+                     "ts": round((start - origin) * 1e6, 3), "dur": round((end - start) * 1e6, 3)}
+            if args:
+                event["args"] = args
+            events.append(event)
+        return events
+
+    def write(self, path):
+        """Write the buffer to `path` as Chrome Trace Event JSON"""
+        with open(path, "w") as f:
+            json.dump({"traceEvents": self.trace_events(), "displayTimeUnit": "ms"}, f)
+
+
+tracer = Tracer()